@@ -0,0 +1,179 @@
+# benchmarks/bench_planning.py
+"""Benchmarks for the planning hot paths.
+
+    python benchmarks/bench_planning.py -o results.json
+    python benchmarks/bench_planning.py --baseline baseline.json --tolerance 0.2
+
+Results are written as JSON (median/min seconds per case). With --baseline,
+cases whose median is slower than baseline * (1 + tolerance) are reported and
+the script exits with status 1.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from constants import TROOP_TYPES, PET_BUFF_LEVELS, CITY_BUFF_OPTIONS, MINISTER_BUFF_VALUE
+from models.batch_planner import generate_marches_batch
+from models.buff_index import effective_march_sizes, get_buff_index
+from models.buffs import BuffConfiguration
+from models.troop_count import TroopCount
+from models.feasibility import FeasibilityRegion
+from models.formation_registry import get_registry
+from models.troop_manager import TroopManager
+
+SEED = 20240501
+MARCH_COUNTS = [1, 2, 3, 4, 5, 6, 7, 10, 20]
+TROOP_MAGNITUDES = [1_000, 100_000, 10_000_000]
+ROSTER_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_ROSTER_SIZES = [1_000, 10_000]
+BASE_MARCH_SIZE = 100_000
+BUFFS = BuffConfiguration(PET_BUFF_LEVELS["Level 5"], 10, MINISTER_BUFF_VALUE)
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float = 0.05) -> Dict[str, float]:
+    """Time func, looping enough calls per sample to exceed min_time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    return {'median_s': statistics.median(samples), 'min_s': min(samples), 'calls': number, 'repeat': repeat}
+
+
+def planning_cases(rng: random.Random) -> Dict[str, Callable[[], object]]:
+    manager = TroopManager(BASE_MARCH_SIZE, BUFFS)
+    registry = get_registry()
+    cases = {
+        'calculate_total_buff': lambda: BUFFS.calculate_total_buff(BASE_MARCH_SIZE),
+        'buff_index.lookup': lambda: get_buff_index(BASE_MARCH_SIZE).lookup(BUFFS),
+    }
+
+    for magnitude in TROOP_MAGNITUDES:
+        troops = TroopCount(*(rng.randint(magnitude // 2, magnitude) for _ in TROOP_TYPES))
+        available = troops.to_dict()
+        ratio = registry.get("Bear")
+        cases[f'_generate_single_march/troops={magnitude}'] = (
+            lambda a=available: manager._generate_single_march(manager.effective_march_size, a, ratio))
+
+        for num_marches in MARCH_COUNTS:
+            ratios = [ratio] * num_marches
+            cases[f'generate_marches/troops={magnitude}/marches={num_marches}'] = (
+                lambda n=num_marches, t=troops, r=ratios: manager.generate_marches(n, t, r))
+
+        sizes = (manager.effective_march_size,) * 7
+        region = FeasibilityRegion(troops, sizes)
+        cases[f'feasibility_region/troops={magnitude}/marches=7'] = (
+            lambda t=troops: FeasibilityRegion(t, sizes))
+        cases[f'feasibility_region.is_feasible/troops={magnitude}'] = (
+            lambda r=region: r.is_feasible(ratio))
+
+        for formation in registry:
+            cases[f'optimize_ratio/troops={magnitude}/formation={formation}'] = (
+                lambda t=troops, f=formation: manager.optimize_ratio(7, t, f))
+            cases[f'solve_ratio/troops={magnitude}/formation={formation}'] = (
+                lambda t=troops, f=formation: manager.solve_ratio(7, t, f))
+
+    return cases
+
+
+def roster_cases(np_rng: np.random.Generator, roster_sizes: List[int]) -> Dict[str, Callable[[], object]]:
+    cases = {}
+    bear = get_registry().get("Bear")
+    ratio = np.array([[bear[t] for t in TROOP_TYPES]] * 7, dtype=np.float64)
+
+    for size in roster_sizes:
+        troops = np_rng.integers(0, 10_000_000, size=(size, len(TROOP_TYPES)))
+        sizes = np_rng.integers(1_000, 200_000, size=size)
+        pets = np_rng.choice(list(PET_BUFF_LEVELS.values()), size=size)
+        cities = np_rng.choice(CITY_BUFF_OPTIONS, size=size)
+        cases[f'effective_march_sizes/players={size}'] = (
+            lambda s=sizes, p=pets, c=cities: effective_march_sizes(s, p, c, MINISTER_BUFF_VALUE))
+        cases[f'generate_marches_batch/players={size}/marches=7'] = (
+            lambda t=troops, s=sizes: generate_marches_batch(t, ratio, s))
+
+    return cases
+
+
+def run(quick: bool, repeat: int) -> Dict[str, object]:
+    cases = planning_cases(random.Random(SEED))
+    cases.update(roster_cases(np.random.default_rng(SEED), QUICK_ROSTER_SIZES if quick else ROSTER_SIZES))
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, repeat)
+        print(f"{name:70s} {results[name]['median_s'] * 1e6:12.2f} us", file=sys.stderr)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[Dict[str, object]]:
+    """Return the cases whose median regressed beyond the tolerance."""
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = result['median_s'] / previous['median_s']
+        if ratio > 1 + tolerance:
+            regressions.append({'case': name, 'baseline_s': previous['median_s'],
+                                'current_s': result['median_s'], 'slowdown': round(ratio, 2)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the planning hot paths.")
+    parser.add_argument('-o', '--output', help="Write results JSON to this file (default stdout).")
+    parser.add_argument('--baseline', help="Compare against a previous results JSON.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%).")
+    parser.add_argument('--repeat', type=int, default=5, help="Samples per case.")
+    parser.add_argument('--quick', action='store_true', help="Skip roster sizes above 10k players.")
+    args = parser.parse_args(argv)
+
+    current = run(args.quick, args.repeat)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        current['regressions'] = compare(current, baseline, args.tolerance)
+
+    output = json.dumps(current, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+    for regression in current.get('regressions', []):
+        print(f"REGRESSION {regression['case']}: {regression['slowdown']}x slower", file=sys.stderr)
+    return 1 if current.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
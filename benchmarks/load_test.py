@@ -0,0 +1,131 @@
+# benchmarks/load_test.py
+"""Drive the planning service with many concurrent keep-alive clients.
+
+    python service.py &
+    python benchmarks/load_test.py --clients 2000 --requests 20
+
+    python benchmarks/load_test.py --in-process --clients 2000
+
+Prints client-side p50/p99 latency and throughput, plus the service's own /stats.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.formation_registry import get_registry
+from service import PlanningService
+
+
+def build_payload(rng: random.Random) -> Tuple[str, Dict[str, object]]:
+    payload = {
+        'base_march_size': rng.randint(1_000, 150_000),
+        'pet_buff': rng.choice([0, 4500, 15000]),
+        'city_buff': rng.choice([0, 10, 20]),
+        'minister_buff': rng.choice([0, 2500]),
+        'troops': {troop_type: rng.randint(0, 2_000_000) for troop_type in TROOP_TYPES},
+        'num_marches': rng.randint(1, 7),
+    }
+    registry = get_registry()
+    formation = rng.choice(registry.names)
+    if rng.random() < 0.5:
+        payload['formation'] = formation
+        return '/optimize_ratio', payload
+    payload['ratio'] = registry.get(formation)
+    return '/generate_marches', payload
+
+
+async def request(reader, writer, method: str, path: str, payload=None) -> Dict[str, object]:
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    data = json.loads(await reader.readexactly(length))
+    if b' 200 ' not in status:
+        raise RuntimeError(f"{path}: {status.decode().strip()} {data}")
+    return data
+
+
+async def client(host: str, port: int, num_requests: int, seed: int, latencies: List[float]) -> None:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(num_requests):
+            path, payload = build_payload(rng)
+            start = time.perf_counter()
+            await request(reader, writer, 'POST', path, payload)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, clients: int, num_requests: int, in_process: bool,
+              max_batch: int, max_wait: float) -> Dict[str, object]:
+    server = None
+    if in_process:
+        server = await PlanningService(max_batch, max_wait).start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, num_requests, seed, latencies) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    service_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+    await writer.wait_closed()
+    if server:
+        server.close()
+        await server.wait_closed()
+        # Let the service's connection handlers see the closed sockets before the loop stops
+        await asyncio.sleep(0.1)
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+        'service': service_stats,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the planning service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=1000, help="Concurrent connections.")
+    parser.add_argument('--requests', type=int, default=10, help="Requests per client.")
+    parser.add_argument('--in-process', action='store_true', help="Start the service in this process.")
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.host, args.port, args.clients, args.requests, args.in_process,
+                             args.max_batch, args.max_wait_ms / 1000))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# cli.py
+"""Headless roster planner.
+
+Streams a CSV or JSONL roster (one player per row) through TroopManager and
+writes the planned marches as JSONL or CSV, one row at a time:
+
+    python cli.py roster.csv -o marches.jsonl
+    cat roster.jsonl | python cli.py - --input-format jsonl --output-format csv
+    python cli.py roster.csv --workers 8 -o marches.jsonl
+    python cli.py roster.csv --scaling-report 8
+
+Roster columns: id, base_march_size, pet_buff (level name or value), city_buff,
+minister_buff, infantry_t10, lancer_t10, marksman_t10, infantry_t11, lancer_t11,
+marksman_t11, formation, num_marches. base_march_size is required; rows that
+cannot be parsed are written as error records and the run carries on.
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, TextIO
+
+from constants import TROOP_TYPES
+from models.formation_registry import get_registry
+from models.parallel_runner import DEFAULT_CHUNK_SIZE, plan_scenarios_parallel, scaling_report
+from models.scenario import parse_scenarios
+
+MARCH_CSV_FIELDS = ['id', 'march', *TROOP_TYPES, 'total', 'error']
+
+
+def read_rows(stream: TextIO, input_format: str) -> Iterator[Dict[str, Any]]:
+    if input_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # parse_scenarios reports it as an error row
+                yield None
+
+
+def write_jsonl(results: Iterable[Dict[str, Any]], stream: TextIO) -> int:
+    count = 0
+    for result in results:
+        stream.write(json.dumps(result, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(results: Iterable[Dict[str, Any]], stream: TextIO) -> int:
+    writer = csv.DictWriter(stream, fieldnames=MARCH_CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for result in results:
+        if 'error' in result:
+            writer.writerow({'id': result['id'], 'error': result['error']})
+        for i, march in enumerate(result.get('marches', []), 1):
+            writer.writerow({'id': result['id'], 'march': i, **march})
+        count += 1
+    return count
+
+
+def _guess_format(path: str, default: str = 'jsonl') -> str:
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith(('.jsonl', '.json')):
+        return 'jsonl'
+    return default
+
+
+def _int_at_least(minimum: int):
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    # argparse names the type in its "invalid <type> value" message
+    parse.__name__ = 'int'
+    return parse
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Plan marches for a roster without the Streamlit UI.")
+    parser.add_argument('input', help="Roster file, or - for stdin.")
+    parser.add_argument('-o', '--output', default='-', help="Output file, or - for stdout (default).")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help="Defaults to the input file extension.")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help="Defaults to the output file extension.")
+    parser.add_argument('-w', '--workers', type=_int_at_least(0), default=1, help="Worker processes (default 1, 0 for all cores).")
+    parser.add_argument('--chunk-size', type=_int_at_least(1), default=DEFAULT_CHUNK_SIZE, help="Scenarios per worker task.")
+    parser.add_argument('--scaling-report', type=_int_at_least(1), metavar='N',
+                        help="Time the roster with 1..N workers and print a JSON report instead of planning.")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    input_format = args.input_format or _guess_format(args.input, default='csv')
+    output_format = args.output_format or _guess_format(args.output)
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    registry = get_registry()
+    if registry.load_error:
+        print(f"warning: {registry.load_error}; using the last good formations.", file=sys.stderr)
+    try:
+        scenarios = parse_scenarios(read_rows(source, input_format))
+        if args.scaling_report:
+            report = scaling_report(list(scenarios), args.scaling_report, args.chunk_size)
+            target.write(json.dumps(report, indent=2) + '\n')
+            return 0
+
+        results = plan_scenarios_parallel(scenarios, args.workers or None, args.chunk_size)
+        writer = write_csv if output_format == 'csv' else write_jsonl
+        count = writer(results, target)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"Planned {count} rows.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -19,3 +19,21 @@ PET_BUFF_LEVELS = {
 }
 
 MINISTER_BUFF_VALUE = 2500
+
+PLAN_CACHE_SIZE = 256
+
+MAX_MARCHES = 100
+# Largest count, size or flat buff accepted: a buffed size is at most 4 * MAX_COUNT, so the
+# sizes of every march times basis points (10000 per 100%) still fit in int64
+MAX_COUNT = (2 ** 63 - 1) // (10000 * MAX_MARCHES * 4)
+
+TROOP_TIERS = list(range(1, 12))
+
+CITY_BUFF_OPTIONS = (0, 10, 20)
+
+FORMATIONS_FILE = 'formations.json'
+USER_FORMATIONS_FILE = 'user_formations.json'
+FORMATION_RELOAD_INTERVAL = 1.0
+DEFAULT_FORMATION_RATIO = {"infantry": 33.33, "lancer": 33.33, "marksman": 33.34}
+
+ROSTER_FILE = 'roster.bin'
@@ -0,0 +1,158 @@
+# instrumentation.py
+"""Opt-in timers and call counters for the planning hot paths.
+
+Functions decorated with @timed() record their call count and wall time while
+instrumentation is enabled. When it is disabled the wrapper only checks one flag
+before calling through. enable(profile=True) also collects a cProfile profile
+for code run inside profiled(). Each caller (e.g. an app session) enables and
+disables instrumentation under its own owner key; it stays on while any owner
+has it enabled, and prune() drops owners that have gone away.
+"""
+import cProfile
+import functools
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class _State:
+    enabled = False
+    profiler: Optional[cProfile.Profile] = None
+
+
+_state = _State()
+_lock = threading.Lock()
+_timings: Dict[str, List[float]] = {}
+# Owners with instrumentation enabled, mapped to whether they want profiling
+_owners: Dict[Hashable, bool] = {}
+
+
+def enable(profile: bool = False, owner: Hashable = None) -> None:
+    """Turn instrumentation on for owner, with profiling if profile is set."""
+    with _lock:
+        _owners[owner] = profile
+        _apply()
+
+
+def disable(owner: Hashable = None) -> None:
+    """Turn instrumentation off for owner; it stops once no owner has it on."""
+    with _lock:
+        if _owners.pop(owner, None) is not None:
+            _apply()
+
+
+def prune(is_active: Callable[[Hashable], bool]) -> None:
+    """Drop owners for which is_active is false, e.g. app sessions that have closed."""
+    with _lock:
+        gone = [owner for owner in _owners if not is_active(owner)]
+        for owner in gone:
+            del _owners[owner]
+        if gone:
+            _apply()
+
+
+def _apply() -> None:
+    _state.enabled = bool(_owners)
+    if not any(_owners.values()):
+        _state.profiler = None
+    elif _state.profiler is None:
+        _state.profiler = cProfile.Profile()
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def reset() -> None:
+    with _lock:
+        _timings.clear()
+    if _state.profiler is not None:
+        _state.profiler = cProfile.Profile()
+
+
+def record(name: str, seconds: float) -> None:
+    with _lock:
+        entry = _timings.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator that records calls and wall time under name (default: the function's qualname)."""
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled():
+    """Collect a cProfile profile of the block when profiling is enabled."""
+    profiler = _state.profiler
+    if profiler is None:
+        yield
+        return
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another thread is already profiling with this profiler
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+
+def snapshot() -> List[Dict[str, float]]:
+    """Return one row per timer, slowest total first."""
+    with _lock:
+        rows = [
+            {
+                'name': name,
+                'calls': int(calls),
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total * 1000 / calls, 3) if calls else 0.0,
+                'max_ms': round(longest * 1000, 3),
+            }
+            for name, (calls, total, longest) in _timings.items()
+        ]
+    return sorted(rows, key=lambda row: -row['total_ms'])
+
+
+def export_json() -> str:
+    return json.dumps({'timers': snapshot()}, indent=2)
+
+
+def export_cprofile() -> Optional[bytes]:
+    """Return the collected profile in pstats/cProfile format, or None if profiling is off."""
+    if _state.profiler is None:
+        return None
+    handle, path = tempfile.mkstemp(suffix='.prof')
+    os.close(handle)
+    try:
+        pstats.Stats(_state.profiler).dump_stats(path)
+        with open(path, 'rb') as f:
+            return f.read()
+    except TypeError:
+        # Nothing has been profiled yet
+        return None
+    finally:
+        os.remove(path)
@@ -1,41 +1,162 @@
 from typing import Dict, List, Tuple, Optional
 
 import streamlit as st
-from constants import TROOP_TYPES, PET_BUFF_LEVELS, MINISTER_BUFF_VALUE
+from streamlit import runtime
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import instrumentation
+from instrumentation import timed
+from constants import TROOP_TYPES, TROOP_TIERS, PET_BUFF_LEVELS, MINISTER_BUFF_VALUE, PLAN_CACHE_SIZE, ROSTER_FILE
 from models.buffs import BuffConfiguration
+from models.buff_index import get_buff_index
 from models.troop_count import TroopCount
+from models.troop_inventory import TroopInventory
 from models.troop_manager import TroopManager
+from models.plan_cache import PlanCache
+from models.formation_registry import FormationRegistry, ROOT_DIR, get_registry
+from models.roster_store import RosterStore
+from models.wave_simulation import HealModel, LossModel
+from models.feasibility import get_feasibility_region, march_shortfalls
 
 
 def main():
     st.set_page_config(page_title="Troop Manager", layout="centered")
     st.title('Troop Formation Builder & Ratio Optimizer')
 
+    show_performance = render_performance_toggle()
+
     # Setup the different sections of the app
-    max_march_size = render_march_setup_section()
-    buffs, total_buff = render_buffs_section(max_march_size)
-    troops, troop_manager = render_troops_input_section(max_march_size, buffs)
-    num_marches, optimized_ratio = render_ratio_optimization_section(troops, troop_manager)
-    render_march_generation_section(num_marches, troops, troop_manager, buffs)
+    with instrumentation.profiled():
+        render_roster_loader()
+        max_march_size = render_march_setup_section()
+        buffs, total_buff = render_buffs_section(max_march_size)
+        troops, troop_manager, inventory = render_troops_input_section(max_march_size, buffs)
+        num_marches, optimized_ratio = render_ratio_optimization_section(troops, troop_manager)
+        render_march_generation_section(num_marches, inventory, troop_manager, buffs)
+        render_wave_simulation_section(num_marches, troops, troop_manager)
+    render_roster_saver(max_march_size, buffs, inventory)
+    render_plan_cache_stats()
+    if show_performance:
+        render_performance_panel()
+
+
+@st.cache_resource
+def get_plan_cache() -> PlanCache:
+    """Return the planning cache shared by every session of this server."""
+    return PlanCache(maxsize=PLAN_CACHE_SIZE)
+
+
+@st.cache_resource(max_entries=PLAN_CACHE_SIZE)
+def get_troop_manager(max_march_size: int, pet_buff: int, city_buff: int, minister_buff: int) -> TroopManager:
+    """Return a shared troop manager for the given march size and buffs."""
+    buffs = BuffConfiguration(pet_buff, city_buff, minister_buff)
+    return TroopManager(max_march_size, buffs, cache=get_plan_cache())
+
+
+@st.cache_resource
+def get_roster_store() -> RosterStore:
+    """Return the saved-accounts store shared by every session of this server."""
+    return RosterStore(ROOT_DIR / ROSTER_FILE)
+
+
+def render_roster_loader() -> None:
+    """Render the saved-account picker; loading fills the setup, buff and troop inputs."""
+    store = get_roster_store()
+    st.sidebar.subheader('Saved Accounts')
+    if not len(store):
+        st.sidebar.caption("No saved accounts yet.")
+        return
+
+    name = st.sidebar.selectbox('Account', options=store.names, key='roster_account')
+    if st.sidebar.button('Load account'):
+        base_march_size, buffs, inventory = store.load(name)
+        pet_levels = {value: level for level, value in PET_BUFF_LEVELS.items()}
+        st.session_state['max_march_size'] = base_march_size
+        st.session_state['pet_buff_level'] = pet_levels.get(buffs.pet_buff, 'No Buff')
+        st.session_state['city_buff_10'] = buffs.city_buff == 10
+        st.session_state['city_buff_20'] = buffs.city_buff == 20
+        st.session_state['minister_buff_enabled'] = bool(buffs.minister_buff)
+        for troop_type in TROOP_TYPES:
+            for tier in (10, 11):
+                st.session_state[f"{troop_type}_t{tier}"] = inventory.get(troop_type, tier)
+
+
+def render_roster_saver(max_march_size: int, buffs: BuffConfiguration, inventory: TroopInventory) -> None:
+    """Render the form that saves the current setup under an account name."""
+    with st.sidebar.form('save_account', clear_on_submit=True):
+        name = st.text_input('Account name', max_chars=32)
+        if st.form_submit_button('Save account'):
+            try:
+                get_roster_store().save(name.strip(), max_march_size, buffs, inventory)
+                st.success(f"Saved {name.strip()}.")
+            except ValueError as e:
+                st.error(str(e))
+
+
+def render_plan_cache_stats() -> None:
+    """Render the shared planning cache counters in the sidebar."""
+    stats = get_plan_cache().stats()
+    st.sidebar.caption(f"Plan cache: {stats['hits']} hits, {stats['misses']} misses, "
+                       f"{stats['size']}/{stats['maxsize']} entries")
+
+
+def render_performance_toggle() -> bool:
+    """Render the sidebar switches for instrumentation and apply them before the sections run."""
+    enabled = st.sidebar.toggle('Performance panel', help="Time TroopManager, buffs and each section.")
+    profile = enabled and st.sidebar.checkbox('Collect cProfile data')
+
+    # Instrumentation is process-wide: switch it for this session only, and drop
+    # sessions that closed with the panel on so they cannot keep it running
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else None
+    if runtime.exists():
+        instrumentation.prune(runtime.get_instance().is_active_session)
+    if enabled:
+        instrumentation.enable(profile=profile, owner=session_id)
+    else:
+        instrumentation.disable(owner=session_id)
+    return enabled
 
 
+def render_performance_panel() -> None:
+    """Render timers and call counters collected by the instrumentation layer."""
+    st.sidebar.subheader('Performance')
+    rows = instrumentation.snapshot()
+    if rows:
+        st.sidebar.dataframe(rows, hide_index=True)
+    else:
+        st.sidebar.caption("No timings recorded yet.")
+
+    st.sidebar.download_button('Export JSON', instrumentation.export_json(),
+                               file_name='troop_manager_timings.json', mime='application/json')
+    profile = instrumentation.export_cprofile()
+    if profile:
+        st.sidebar.download_button('Export cProfile', profile, file_name='troop_manager.prof')
+    if st.sidebar.button('Reset timings'):
+        instrumentation.reset()
+
+
+@timed()
 def render_march_setup_section() -> int:
     """Render the march setup section and return the max march size."""
     st.header("March Setup", divider="blue", help="Setup your Marches and Troops.")
-    return st.number_input('Base March Size', min_value=1, value=1000, format="%d")
+    return st.number_input('Base March Size', min_value=1, value=1000, format="%d", key='max_march_size')
 
 
+@timed()
 def render_buffs_section(max_march_size: int) -> Tuple[BuffConfiguration, int]:
     """Render the buffs section and return the buff configuration and total buff value."""
     st.subheader('Buffs')
 
     # Pet buff
-    pet_buff = st.selectbox('Select Snow Ape Pet Buff Level', options=list(PET_BUFF_LEVELS.keys()), index=0)
+    pet_buff = st.selectbox('Select Snow Ape Pet Buff Level', options=list(PET_BUFF_LEVELS.keys()), index=0,
+                            key='pet_buff_level')
     pet_buff_value = PET_BUFF_LEVELS[pet_buff]
 
     # City buff
-    city_buff_10 = st.checkbox('Apply 10% City Buff')
-    city_buff_20 = st.checkbox('Apply 20% City Buff')
+    city_buff_10 = st.checkbox('Apply 10% City Buff', key='city_buff_10')
+    city_buff_20 = st.checkbox('Apply 20% City Buff', key='city_buff_20')
 
     if city_buff_10 and city_buff_20:
         st.error('You cannot select both 10% and 20% City Buff. Please choose one.')
@@ -48,7 +169,7 @@ def render_buffs_section(max_march_size: int) -> Tuple[BuffConfiguration, int]:
         city_buff = 0
 
     # Minister buff
-    minister_buff_enabled = st.checkbox('Apply Minister of Strategy Buff')
+    minister_buff_enabled = st.checkbox('Apply Minister of Strategy Buff', key='minister_buff_enabled')
     minister_buff = MINISTER_BUFF_VALUE if minister_buff_enabled else 0
 
     # Create buff configuration and display summary
@@ -75,17 +196,19 @@ def render_buffs_section(max_march_size: int) -> Tuple[BuffConfiguration, int]:
         </style>
         <div class="divider"></div>
         """, unsafe_allow_html=True)
-    total_buff = buffs.calculate_total_buff(max_march_size)
-    st.write("Total Buff: ", pet_buff_value + int(max_march_size * buffs.city_buff / 100) + buffs.minister_buff,
-             " troops")
+    buff_index = get_buff_index(max_march_size)
+    total_buff = buff_index.lookup(buffs)
+    st.write("Total Buff: ", buff_index.total_buff(buffs), " troops")
 
     st.write("Total Buffed March Size: ", total_buff, " troops")
 
     return buffs, total_buff
 
 
-def render_troops_input_section(max_march_size: int, buffs: BuffConfiguration) -> Tuple[TroopCount, TroopManager]:
-    """Render the troops input section and return the troop count and troop manager."""
+@timed()
+def render_troops_input_section(max_march_size: int,
+                                buffs: BuffConfiguration) -> Tuple[TroopCount, TroopManager, TroopInventory]:
+    """Render the troops input section and return the troop count, troop manager and tiered inventory."""
     st.subheader('Troops Input')
 
     # T10 troops
@@ -113,13 +236,16 @@ def render_troops_input_section(max_march_size: int, buffs: BuffConfiguration) -
 
     # T11 troops
     st.subheader('T11 Troops')
-    infantry_t11 = st.number_input('Infantry T11', min_value=0, value=0, format="%d")
-    lancer_t11 = st.number_input('Lancer T11', min_value=0, value=0, format="%d")
-    marksman_t11 = st.number_input('Marksman T11', min_value=0, value=0, format="%d")
+    infantry_t11 = st.number_input('Infantry T11', min_value=0, value=0, format="%d", key="infantry_t11")
+    lancer_t11 = st.number_input('Lancer T11', min_value=0, value=0, format="%d", key="lancer_t11")
+    marksman_t11 = st.number_input('Marksman T11', min_value=0, value=0, format="%d", key="marksman_t11")
 
     # Create troop count and display summary
-    troops = TroopCount(infantry=infantry_t11 + infantry_t10, lancer=lancer_t11 + lancer_t10,
-        marksman=marksman_t11 + marksman_t10)
+    inventory = TroopInventory.from_tiers({
+        10: {'infantry': infantry_t10, 'lancer': lancer_t10, 'marksman': marksman_t10},
+        11: {'infantry': infantry_t11, 'lancer': lancer_t11, 'marksman': marksman_t11},
+    })
+    troops = inventory.to_troop_count()
 
     # Display summary
     troops_dict = troops.to_dict()
@@ -127,64 +253,143 @@ def render_troops_input_section(max_march_size: int, buffs: BuffConfiguration) -
     for troop_type in TROOP_TYPES:
         st.write(f"Total {troop_type.capitalize()}: {troops_dict[troop_type]:,}")
 
-    return troops, TroopManager(max_march_size, buffs)
+    return troops, get_troop_manager(max_march_size, buffs.pet_buff, buffs.city_buff, buffs.minister_buff), inventory
 
 
+@timed()
 def render_ratio_optimization_section(troops: TroopCount, troop_manager: TroopManager) -> Tuple[int, Dict[str, float]]:
     """Render the ratio optimization section and return the number of marches and optimized ratio."""
     st.header("Optimize Ratios", divider="blue")
 
-    formation_ratios = {
-        "Bear": {"infantry": 10, "lancer": 30, "marksman": 60},
-        "Balanced": {"infantry": 34, "lancer": 33, "marksman": 33},
-        "Marksman Rush": {"infantry": 5, "lancer": 15, "marksman": 80},
-        "Lancer Charge": {"infantry": 5, "lancer": 85, "marksman": 10},
-        "Infantry Wall": {"infantry": 80, "lancer": 10, "marksman": 10},
-        "Standard Formation": {"infantry": 45, "lancer": 10, "marksman": 45},
-        "Garrison": {"infantry": 50, "lancer": 40, "marksman": 10},
-        "Rally": {"infantry": 30, "lancer": 20, "marksman": 50}
-    }
-
-    for name, values in formation_ratios.items():
+    num_marches = st.selectbox('Number of Marches', options=[1, 2, 3, 4, 5, 6, 7], index=0)
+    render_ratio_optimizer(num_marches, troops, troop_manager)
+
+    return num_marches, st.session_state.get('optimized_ratio', {})
+
+
+@st.fragment
+@timed()
+def render_ratio_optimizer(num_marches: int, troops: TroopCount, troop_manager: TroopManager) -> None:
+    """Render the formation picker and optimizer; reruns on its own when its widgets change."""
+    registry = get_registry()
+    if registry.load_error:
+        st.warning(f"Formation files could not be reloaded, using the last good formations: {registry.load_error}")
+    # Saved before listing so a new formation shows up in this same run
+    render_custom_formation_form(registry)
+
+    for name, values in registry.ratios().items():
         st.markdown(
             f"- **{name}** → Infantry: {values['infantry']}%, Lancer: {values['lancer']}%, Marksman: {values['marksman']}%")
 
-    ratio_type = st.selectbox("Select Formation Ratio Type", options=list(formation_ratios.keys()))
-    num_marches = st.selectbox('Number of Marches', options=[1, 2, 3, 4, 5, 6, 7], index=0)
+    ratio_type = st.selectbox("Select Formation Ratio Type", options=registry.names)
+    exact_solver = st.checkbox('Use exact solver', help="Find the ratio closest to the formation that still fills every march.")
 
-    optimized_ratio = {}
     if st.button('Optimize Ratios'):
-        optimized_ratio = troop_manager.optimize_ratio(num_marches, troops, ratio_type)
+        if exact_solver:
+            solution = troop_manager.solve_ratio(num_marches, troops, ratio_type)
+            optimized_ratio = solution.ratio
+            st.session_state['optimized_gap'] = solution.gap if solution.feasible else None
+        else:
+            optimized_ratio = troop_manager.optimize_ratio(num_marches, troops, ratio_type)
+            st.session_state.pop('optimized_gap', None)
         st.session_state['optimized_ratio'] = optimized_ratio
 
+    if st.button('Compare All Formations', help="Rank every formation against 1-7 marches by fill rate and distance."):
+        st.session_state['formation_sweep'] = [result.to_row() for result in troop_manager.sweep_formations(troops)]
+
+    if 'formation_sweep' in st.session_state:
+        st.write('### Formation Comparison')
+        st.dataframe(st.session_state['formation_sweep'], hide_index=True)
+
     if 'optimized_ratio' in st.session_state:
         st.write('### Optimized Troop Ratios')
         for troop_type, percent in st.session_state['optimized_ratio'].items():
             st.write(f"{troop_type.capitalize()}: {percent}%")
-
-    return num_marches, optimized_ratio
-
-
-def render_march_generation_section(num_marches: int, troops: TroopCount, troop_manager: TroopManager,
+        if 'optimized_gap' in st.session_state:
+            gap = st.session_state['optimized_gap']
+            if gap is None:
+                st.warning("Not enough troops to fill every march; showing the ratio of all available troops.")
+            else:
+                st.write(f"Gap from {ratio_type}: {gap} percentage points")
+
+
+def render_custom_formation_form(registry: FormationRegistry) -> None:
+    """Render a form to save a user-defined formation into the registry."""
+    with st.expander("Add Custom Formation"):
+        with st.form("custom_formation", clear_on_submit=True):
+            name = st.text_input("Formation Name")
+            columns = st.columns(len(TROOP_TYPES))
+            ratio = {
+                troop_type: column.number_input(f"{troop_type.capitalize()} %", min_value=0, max_value=100, step=1)
+                for troop_type, column in zip(TROOP_TYPES, columns)
+            }
+            if st.form_submit_button("Save Formation"):
+                if not name.strip():
+                    st.error("Give the formation a name.")
+                    return
+                try:
+                    registry.save_user_formation(name.strip(), ratio)
+                except ValueError as e:
+                    st.error(str(e))
+
+
+@st.fragment
+@timed()
+def render_march_generation_section(num_marches: int, inventory: TroopInventory, troop_manager: TroopManager,
                                     buffs: BuffConfiguration) -> None:
-    """Render the march generation section."""
+    """Render the march generation section; reruns on its own when its widgets change."""
     st.header("Generate Marches", divider="blue")
 
+    troops = inventory.to_troop_count()
     use_same_ratio = st.checkbox("Use same ratio for all marches", value=True)
-    effective_march_size = buffs.calculate_total_buff(troop_manager.max_march_size)
+    effective_march_size = troop_manager.effective_march_size
 
     if use_same_ratio:
         ratio = render_global_ratio_input(troops, num_marches, effective_march_size)
-        if not st.session_state.get("global_ratio_valid", True):
-            return
-        ratios = [ratio.copy() for _ in range(num_marches)]
+        ratios = [ratio.copy() for _ in range(num_marches)] if ratio else []
+        valid_key = "global_ratio_valid"
     else:
-        ratios = render_individual_ratio_inputs(num_marches, effective_march_size)
-        if not st.session_state.get("individual_ratios_valid", True):
-            return
-
-    render_march_results_button(num_marches, troops, troop_manager, ratios)
-
+        ratios = render_individual_ratio_inputs(num_marches, effective_march_size, troops)
+        valid_key = "individual_ratios_valid"
+
+    # Slider groups rerun as their own fragments, so validity is checked when the button is pressed
+    render_march_results_button(num_marches, inventory, troop_manager, ratios, valid_key)
+
+@st.fragment
+@timed()
+def render_wave_simulation_section(num_marches: int, troops: TroopCount, troop_manager: TroopManager) -> None:
+    """Render the multi-wave Monte Carlo simulation; reruns on its own when its widgets change."""
+    st.header("Simulate Waves", divider="blue",
+              help="Replan every wave after random losses and heals, e.g. for Bear hunts and rallies.")
+
+    registry = get_registry()
+    formation = st.selectbox("Formation", options=registry.names, key="simulation_formation",
+                             help="The ratio is re-optimized towards this formation before every wave.")
+    columns = st.columns(3)
+    num_waves = columns[0].number_input("Waves", min_value=1, max_value=50, value=5)
+    num_scenarios = columns[1].number_input("Scenarios", min_value=100, max_value=100000, value=2000, step=100)
+    seed = columns[2].number_input("Seed", min_value=0, value=0)
+    columns = st.columns(3)
+    loss_rate = columns[0].slider("Loss % per wave", 0, 100, 10)
+    loss_spread = columns[1].slider("Loss spread %", 0, 50, 5)
+    heal_rate = columns[2].slider("Healed % of losses", 0, 100, 50)
+    heal_capacity = st.number_input("Heal capacity per wave (0 = unlimited)", min_value=0, value=0, step=1000)
+
+    if st.button("Run Simulation"):
+        loss = LossModel({troop_type: loss_rate / 100 for troop_type in TROOP_TYPES}, loss_spread / 100)
+        heal = HealModel(heal_rate / 100, heal_capacity or None)
+        ratios = [registry.get(formation)] * num_marches
+
+        # Show each wave as soon as it is simulated
+        table = st.empty()
+        rows = []
+        for summary in troop_manager.simulate_waves(num_marches, troops, ratios, num_waves, num_scenarios,
+                                                    loss, heal, ratio_type=formation, seed=seed):
+            rows.append(summary.to_row())
+            table.dataframe(rows, hide_index=True)
+
+
+@timed()
 def render_ratio_slider_group(prefix: str, index: Optional[int] = None, default_values: Dict[str, int] = None) -> Dict[str, int]:
     """Render sliders with increment/decrement buttons for Infantry, Lancer, Marksman."""
     troop_types = ['infantry', 'lancer', 'marksman']
@@ -227,6 +432,8 @@ def render_ratio_slider_group(prefix: str, index: Optional[int] = None, default_
 
     return result
 
+@st.fragment
+@timed()
 def render_global_ratio_input(troops: TroopCount, num_marches: int, effective_march_size: int) -> Optional[Dict[str, int]]:
     """Render global sliders + buttons using the shared slider group."""
     st.subheader("Global Troop Ratio for All Marches")
@@ -242,6 +449,8 @@ def render_global_ratio_input(troops: TroopCount, num_marches: int, effective_ma
         return None
 
     display_global_requirements(troops, ratio, num_marches, effective_march_size)
+    region = get_feasibility_region(troops, (effective_march_size,) * num_marches)
+    display_ratio_feasibility({} if region.is_feasible(ratio) else region.shortfall(ratio), "Every march")
     return ratio
 
 
@@ -258,26 +467,58 @@ def display_global_requirements(troops: TroopCount, ratio: Dict[str, float], num
         f"**Infantry:** {troops_dict['infantry']:,} _(Needs: {infantry_needs:,})_ | " + f"**Lancer:** {troops_dict['lancer']:,} _(Needs: {lancer_needs:,})_ | " + f"**Marksman:** {troops_dict['marksman']:,} _(Needs: {marksman_needs:,})_")
 
 
-def render_individual_ratio_inputs(num_marches: int, effective_march_size: int) -> List[Dict[str, int]]:
-    """Render sliders + buttons for individual ratios using shared helper."""
-    ratios = []
-    valid = True
+def display_ratio_feasibility(shortfall: Dict[str, int], scope: str) -> None:
+    """Say whether the ratio can be kept as set, given the troops missing for it."""
+    if not any(shortfall.values()):
+        st.success(f"{scope} can keep this ratio as set.")
+        return
+    missing = ", ".join(f"{count:,} {troop_type.capitalize()}"
+                        for troop_type, count in shortfall.items() if count)
+    st.warning(f"{scope} cannot keep this ratio as set (short {missing}); the plan will adjust it.")
+
+
+@st.fragment
+@timed()
+def render_individual_ratio_inputs(num_marches: int, effective_march_size: int,
+                                   troops: TroopCount) -> List[Dict[str, int]]:
+    """Render sliders + buttons for individual ratios using shared helper.
+
+    The marches rerun together as one fragment, so each march is checked
+    against the troops the marches above it leave, as generate_marches plans them.
+    """
+    inputs = [render_individual_ratio_input(i, effective_march_size) for i in range(num_marches)]
+    march_ratios = [ratio for ratio, _ in inputs]
+    shortfalls = march_shortfalls(troops, [effective_march_size] * num_marches, march_ratios)
+    for i, ((_, feasibility), shortfall) in enumerate(zip(inputs, shortfalls)):
+        if shortfall is not None:
+            with feasibility:
+                display_ratio_feasibility(shortfall, "With the marches above, this march" if i else "This march")
+    ratios = [ratio for ratio in march_ratios if ratio]
+
+    st.session_state["individual_ratios_valid"] = all(
+        st.session_state.get(f"march_ratio_valid_{i}", True) for i in range(num_marches))
+    return ratios
 
-    for i in range(num_marches):
-        st.subheader(f"March {i + 1} Ratios")
-        ratio = render_ratio_slider_group("march", index=i, default_values={"infantry": 33, "lancer": 33, "marksman": 34})
-        total = sum(ratio.values())
-        st.markdown(f"**Total: {total}%**")
 
-        if total != 100:
-            valid = False
-            st.warning("Total must equal 100% to generate this march.")
-        else:
-            ratios.append(ratio)
-            display_individual_requirements(ratio, effective_march_size)
+@timed()
+def render_individual_ratio_input(index: int,
+                                  effective_march_size: int) -> Tuple[Optional[Dict[str, int]], DeltaGenerator]:
+    """Render one march's slider group.
 
-    st.session_state["individual_ratios_valid"] = valid
-    return ratios
+    Returns the ratio (None unless it totals 100%) and a placeholder for its feasibility check.
+    """
+    st.subheader(f"March {index + 1} Ratios")
+    ratio = render_ratio_slider_group("march", index=index, default_values={"infantry": 33, "lancer": 33, "marksman": 34})
+    total = sum(ratio.values())
+    st.markdown(f"**Total: {total}%**")
+
+    st.session_state[f"march_ratio_valid_{index}"] = (total == 100)
+    if total != 100:
+        st.warning("Total must equal 100% to generate this march.")
+        return None, st.empty()
+
+    display_individual_requirements(ratio, effective_march_size)
+    return ratio, st.empty()
 
 
 def display_individual_requirements(ratio: Dict[str, float], effective_march_size: int) -> None:
@@ -289,12 +530,16 @@ def display_individual_requirements(ratio: Dict[str, float], effective_march_siz
     st.markdown(f"_Needs: Infantry={inf_amt:,}, Lancer={lan_amt:,}, Marksman={mar_amt:,}_")
 
 
-def render_march_results_button(num_marches: int, troops: TroopCount, troop_manager: TroopManager,
-                                ratios: List[Dict[str, float]]) -> None:
+@timed()
+def render_march_results_button(num_marches: int, inventory: TroopInventory, troop_manager: TroopManager,
+                                ratios: List[Dict[str, float]], valid_key: str) -> None:
     """Render the button to generate march results and display them when clicked."""
     if st.button('Generate Marches'):
+        if not st.session_state.get(valid_key, True):
+            st.error("Every ratio must total 100% before generating marches.")
+            return
         try:
-            marches = troop_manager.generate_marches(num_marches, troops, ratios)
+            marches, tiers = troop_manager.generate_tiered_marches(num_marches, inventory, ratios)
             st.write('### March Formation Results')
 
             for i, march in enumerate(marches, 1):
@@ -302,9 +547,22 @@ def render_march_results_button(num_marches: int, troops: TroopCount, troop_mana
                          f"Lancer = {march['lancer']}, "
                          f"Marksman = {march['marksman']}, "
                          f"Total = {march['total']}")
+                st.caption(format_tier_breakdown(tiers[i - 1]))
         except ValueError as e:
             st.error(str(e))
 
 
+def format_tier_breakdown(march_tiers) -> str:
+    """Describe which tiers fill a march, highest tier first."""
+    parts = []
+    for type_index, troop_type in enumerate(TROOP_TYPES):
+        used = [f"T{tier} {int(march_tiers[type_index, tier_index]):,}"
+                for tier_index, tier in reversed(list(enumerate(TROOP_TIERS)))
+                if march_tiers[type_index, tier_index]]
+        if used:
+            parts.append(f"{troop_type.capitalize()}: {', '.join(used)}")
+    return " | ".join(parts)
+
+
 if __name__ == "__main__":
     main()
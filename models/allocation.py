@@ -0,0 +1,145 @@
+# models/allocation.py
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from constants import TROOP_TYPES
+
+BASIS_POINTS = 10000
+
+
+def to_basis_points(ratio: Dict[str, float]) -> List[int]:
+    """Convert a percentage ratio into integer basis points in TROOP_TYPES order."""
+    return [int(round(ratio[troop_type] * BASIS_POINTS / 100)) for troop_type in TROOP_TYPES]
+
+
+def largest_remainder(total: int, weights: Sequence[int], caps: Optional[Sequence[int]] = None) -> List[int]:
+    """Split an integer total proportionally to integer weights.
+
+    Each share is floor(total * weight / sum(weights)); the leftover units go to the
+    largest remainders, ties broken by position. When caps are given, a share that
+    exceeds its cap is clamped and the rest is split again among the open entries,
+    so when no share exceeds its cap the result is the uncapped split. If only
+    zero-weight entries remain open, they are filled in order.
+    """
+    first_split = None
+    weight_sum = sum(weights)
+    if total > 0 and weight_sum > 0:
+        # Fast path: floor shares plus the leftover units, final unless a cap binds
+        shares = [total * weight // weight_sum for weight in weights]
+        leftover = total - sum(shares)
+        if leftover:
+            remainders = [total * weight % weight_sum for weight in weights]
+            # Stable sort, so equal remainders keep their positional tie-break
+            for i in sorted(range(len(weights)), key=remainders.__getitem__, reverse=True)[:leftover]:
+                shares[i] += 1
+        if caps is None:
+            return shares
+        for share, cap in zip(shares, caps):
+            if share > cap:
+                break
+        else:
+            return shares
+        # Every weighted entry is open, so the clamping loop starts from this split
+        first_split = shares
+
+    size = len(weights)
+    result = [0] * size
+    open_entries = [i for i in range(size) if weights[i] > 0]
+    remaining = total
+
+    while remaining > 0 and open_entries:
+        if first_split is not None:
+            shares = [first_split[i] for i in open_entries]
+            first_split = None
+        else:
+            weight_sum = sum(weights[i] for i in open_entries)
+            shares = [remaining * weights[i] // weight_sum for i in open_entries]
+            leftover = remaining - sum(shares)
+            if leftover:
+                remainders = [remaining * weights[i] % weight_sum for i in open_entries]
+                for j in sorted(range(len(open_entries)), key=remainders.__getitem__, reverse=True)[:leftover]:
+                    shares[j] += 1
+
+        # Clamp shares that reach their cap and re-split the rest among the open entries;
+        # a share equal to its cap keeps its value but takes no part in the re-split
+        still_open = []
+        for i, share in zip(open_entries, shares):
+            room = caps[i] - result[i]
+            if share >= room:
+                share = room
+            else:
+                still_open.append(i)
+            result[i] += share
+            remaining -= share
+
+        if len(still_open) == len(open_entries):
+            break
+        open_entries = still_open
+
+    # Only zero-weight entries are left: fill them in order
+    for i in range(size):
+        if remaining <= 0:
+            break
+        if weights[i] == 0 and (caps is None or caps[i] > 0):
+            give = remaining if caps is None else min(remaining, caps[i])
+            result[i] += give
+            remaining -= give
+
+    return result
+
+
+def largest_remainder_array(totals, weights, caps=None) -> np.ndarray:
+    """Vectorized largest_remainder over rows.
+
+    totals: scalar or (rows,) integers.
+    weights: (rows, size) integer weights.
+    caps: optional (rows, size) upper bounds.
+
+    Returns a (rows, size) int64 array equal to calling largest_remainder row by row.
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    num_rows, size = weights.shape
+    remaining = np.array(np.broadcast_to(np.asarray(totals, dtype=np.int64), (num_rows,)))
+    result = np.zeros((num_rows, size), dtype=np.int64)
+    if caps is None:
+        caps = np.full((num_rows, size), np.iinfo(np.int64).max)
+    else:
+        caps = np.asarray(caps, dtype=np.int64)
+    is_open = np.ones((num_rows, size), dtype=bool)
+    positions = np.broadcast_to(np.arange(size), (num_rows, size))
+
+    # Every round either finishes a row or closes at least one of its entries
+    for _ in range(size + 1):
+        eligible = is_open & (weights > 0) & (remaining[:, None] > 0)
+        weight_sum = np.where(eligible, weights, 0).sum(axis=1)
+        active = weight_sum > 0
+        if not active.any():
+            break
+
+        divisor = np.where(active, weight_sum, 1)[:, None]
+        scaled = remaining[:, None] * np.where(eligible, weights, 0)
+        shares = scaled // divisor
+        leftover = remaining - shares.sum(axis=1)
+
+        key = np.where(eligible, scaled % divisor, -1)
+        order = np.argsort(-key, axis=1, kind='stable')
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, positions, axis=1)
+        shares += (rank < leftover[:, None]) & eligible
+
+        room = caps - result
+        clamped = eligible & (shares >= room)
+        shares = np.where(clamped, room, shares)
+        is_open &= ~clamped
+        result += shares
+        remaining -= shares.sum(axis=1)
+
+    # Only zero-weight entries are left: fill them in order
+    for i in range(size):
+        fill = is_open[:, i] & (weights[:, i] == 0)
+        give = np.where(fill, np.minimum(remaining, caps[:, i] - result[:, i]), 0)
+        result[:, i] += give
+        remaining -= give
+
+    return result
@@ -0,0 +1,72 @@
+# models/batch_planner.py
+import numpy as np
+
+from constants import TROOP_TYPES, MAX_PERCENTAGE
+from models.allocation import BASIS_POINTS, largest_remainder_array
+
+
+def generate_marches_batch(troops: np.ndarray, ratios: np.ndarray, effective_march_sizes) -> np.ndarray:
+    """Plan marches for many players at once.
+
+    troops: (players, types) troop counts, in TROOP_TYPES order.
+    ratios: (players, marches, types) or (marches, types) percentages.
+    effective_march_sizes: scalar, (players,) or (players, marches) buffed march sizes.
+
+    Returns a (players, marches, types) int64 array matching
+    TroopManager.generate_marches for every player.
+    """
+    total = np.array(troops, dtype=np.int64, copy=True)
+    if total.ndim != 2 or total.shape[1] != len(TROOP_TYPES):
+        raise ValueError(f"Troops must have shape (players, {len(TROOP_TYPES)}).")
+    num_players = total.shape[0]
+
+    ratios = np.asarray(ratios, dtype=np.float64)
+    if ratios.ndim == 2:
+        ratios = np.broadcast_to(ratios, (num_players,) + ratios.shape)
+    if ratios.ndim != 3 or ratios.shape[0] != num_players or ratios.shape[2] != len(TROOP_TYPES):
+        raise ValueError(f"Ratios must have shape (players, marches, {len(TROOP_TYPES)}).")
+    num_marches = ratios.shape[1]
+
+    sizes = np.asarray(effective_march_sizes, dtype=np.int64)
+    if sizes.ndim < 2:
+        sizes = np.broadcast_to(sizes, (num_players,))[:, None]
+    sizes = np.broadcast_to(sizes, (num_players, num_marches))
+
+    ratio_totals = np.round(ratios.sum(axis=2), 2)
+    invalid = np.nonzero(ratio_totals != 100.0)
+    if invalid[0].size:
+        raise ValueError(f"March {invalid[1][0] + 1} ratios must total 100%.")
+
+    weights = np.rint(ratios * BASIS_POINTS / 100).astype(np.int64)
+    marches = np.zeros((num_players, num_marches, len(TROOP_TYPES)), dtype=np.int64)
+
+    for i in range(num_marches):
+        # Split each march in basis points, capped by the troops still available
+        march = largest_remainder_array(sizes[:, i], weights[:, i, :], total)
+        total -= march
+        marches[:, i, :] = march
+
+    return marches
+
+
+def optimize_ratio_batch(troops: np.ndarray, ratios: np.ndarray, total_needed) -> np.ndarray:
+    """Vectorized TroopManager.optimize_ratio.
+
+    troops: (players, types) troop counts.
+    ratios: (types,) or (players, types) formation percentages.
+    total_needed: scalar or (players,) troops needed to fill every march, or
+    (players, marches) per-march sizes to be summed.
+
+    Returns (players, types) whole percentages, all zero for players without troops.
+    """
+    caps = np.asarray(troops, dtype=np.int64)
+    num_players = caps.shape[0]
+    weights = np.rint(np.broadcast_to(np.asarray(ratios, dtype=np.float64), caps.shape) * BASIS_POINTS / 100)
+    needed = np.asarray(total_needed, dtype=np.int64)
+    if needed.ndim == 2:
+        needed = needed.sum(axis=1)
+    needed = np.broadcast_to(needed, (num_players,))
+
+    assigned = largest_remainder_array(needed, weights.astype(np.int64), caps)
+    percentages = largest_remainder_array(MAX_PERCENTAGE, assigned)
+    return np.where(assigned.sum(axis=1, keepdims=True) > 0, percentages, 0)
@@ -0,0 +1,65 @@
+# models/buff_index.py
+from functools import lru_cache
+
+import numpy as np
+
+from constants import PET_BUFF_LEVELS, CITY_BUFF_OPTIONS, MINISTER_BUFF_VALUE
+from models.buffs import BuffConfiguration
+
+MINISTER_BUFF_OPTIONS = (0, MINISTER_BUFF_VALUE)
+
+
+_PET_INDEX = {value: i for i, value in enumerate(PET_BUFF_LEVELS.values())}
+_CITY_INDEX = {value: i for i, value in enumerate(CITY_BUFF_OPTIONS)}
+_MINISTER_INDEX = {value: i for i, value in enumerate(MINISTER_BUFF_OPTIONS)}
+
+
+class BuffIndex:
+    """Effective march sizes for every pet/city/minister buff combination of one base size.
+
+    The table is built on first access in one vectorized pass. Lookups made
+    before that compute the single size directly, so creating an index for
+    every distinct base size stays cheap.
+    """
+
+    def __init__(self, base_march_size: int):
+        self.base_march_size = base_march_size
+        self._table = None
+
+    @property
+    def table(self) -> np.ndarray:
+        """(pet levels, city options, minister options) int64 effective sizes."""
+        if self._table is None:
+            pets, cities, ministers = np.meshgrid(list(PET_BUFF_LEVELS.values()), CITY_BUFF_OPTIONS,
+                                                  MINISTER_BUFF_OPTIONS, indexing='ij')
+            self._table = effective_march_sizes(self.base_march_size, pets, cities, ministers)
+        return self._table
+
+    def lookup(self, buffs: BuffConfiguration) -> int:
+        """Return the effective march size, from the table once it is built."""
+        if self._table is not None:
+            try:
+                return int(self._table[_PET_INDEX[buffs.pet_buff],
+                                       _CITY_INDEX[buffs.city_buff],
+                                       _MINISTER_INDEX[buffs.minister_buff]])
+            except KeyError:
+                pass
+        base = self.base_march_size
+        return base + buffs.pet_buff + base * buffs.city_buff // 100 + buffs.minister_buff
+
+    def total_buff(self, buffs: BuffConfiguration) -> int:
+        """Return the troops added on top of the base march size."""
+        return self.lookup(buffs) - self.base_march_size
+
+
+@lru_cache(maxsize=128)
+def get_buff_index(base_march_size: int) -> BuffIndex:
+    """Return the shared index for a base march size, building it on first use."""
+    return BuffIndex(base_march_size)
+
+
+def effective_march_sizes(base_march_sizes, pet_buffs, city_buffs, minister_buffs) -> np.ndarray:
+    """Vectorized BuffConfiguration.calculate_total_buff over arrays of base sizes and buffs."""
+    base = np.asarray(base_march_sizes, dtype=np.int64)
+    city_buff_value = base * np.asarray(city_buffs, dtype=np.int64) // 100
+    return base + np.asarray(pet_buffs, dtype=np.int64) + city_buff_value + np.asarray(minister_buffs, dtype=np.int64)
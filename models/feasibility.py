@@ -0,0 +1,119 @@
+# models/feasibility.py
+from dataclasses import astuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constants import TROOP_TYPES, MAX_PERCENTAGE, PLAN_CACHE_SIZE
+from models.allocation import BASIS_POINTS, largest_remainder, largest_remainder_array, to_basis_points
+from models.troop_count import TroopCount
+
+GRID_SIDE = MAX_PERCENTAGE + 1
+
+
+@lru_cache(maxsize=32)
+def grid_quotas(march_size: int) -> np.ndarray:
+    """Troops per type of one full march at every whole-percent ratio.
+
+    Returns a read-only (GRID_SIDE * GRID_SIDE, types) int64 array indexed by
+    infantry * GRID_SIDE + lancer, marksman taking the rest. Cells where
+    infantry + lancer exceeds 100% are zero.
+    """
+    infantry, lancer = np.divmod(np.arange(GRID_SIDE * GRID_SIDE), GRID_SIDE)
+    marksman = MAX_PERCENTAGE - infantry - lancer
+    valid = marksman >= 0
+
+    percentages = np.stack([infantry, lancer, marksman], axis=1)[valid]
+    quotas = np.zeros((GRID_SIDE * GRID_SIDE, len(TROOP_TYPES)), dtype=np.int64)
+    quotas[valid] = largest_remainder_array(march_size, percentages * (BASIS_POINTS // MAX_PERCENTAGE))
+    quotas.flags.writeable = False
+    return quotas
+
+
+def grid_index(ratio: Dict[str, float]) -> Optional[int]:
+    """Return the grid cell of a whole-percent ratio totalling 100%, or None if it is off the grid."""
+    infantry, lancer, marksman = (ratio[troop_type] for troop_type in TROOP_TYPES)
+    if infantry + lancer + marksman != MAX_PERCENTAGE or min(infantry, lancer, marksman) < 0:
+        return None
+    if any(value != int(value) for value in (infantry, lancer, marksman)):
+        return None
+    return int(infantry) * GRID_SIDE + int(lancer)
+
+
+class FeasibilityRegion:
+    """Whole-percent ratios every march can keep as set, as a packed bitmap.
+
+    A ratio is feasible when, with that ratio for every march, each march gets
+    its full uncapped split, i.e. the summed per-march splits fit in the troops.
+    This is exactly when TroopManager.generate_marches keeps the requested ratio
+    in every march; an infeasible ratio may still fill every march, with the
+    split adjusted to the troops left. Lookups are a single bit test.
+    """
+
+    def __init__(self, troops: TroopCount, march_sizes: Tuple[int, ...]):
+        available = np.array(astuple(troops), dtype=np.int64)
+        needed = sum(grid_quotas(size) for size in march_sizes)
+
+        feasible = (needed <= available).all(axis=1)
+        infantry, lancer = np.divmod(np.arange(GRID_SIDE * GRID_SIDE), GRID_SIDE)
+        feasible &= infantry + lancer <= MAX_PERCENTAGE
+
+        self.march_sizes = march_sizes
+        self.available = available
+        self.count = int(feasible.sum())
+        self.bits = np.packbits(feasible)
+
+    def __contains__(self, ratio: Dict[str, float]) -> bool:
+        return self.is_feasible(ratio)
+
+    def is_feasible(self, ratio: Dict[str, float]) -> bool:
+        index = grid_index(ratio)
+        if index is None:
+            return False
+        return bool(self.bits[index >> 3] >> (7 - (index & 7)) & 1)
+
+    def shortfall(self, ratio: Dict[str, float]) -> Dict[str, int]:
+        """Troops of each type missing to keep this ratio in every march (zero when feasible)."""
+        index = grid_index(ratio)
+        if index is None:
+            raise ValueError("Ratios must be whole percentages totalling 100%.")
+        needed = sum(grid_quotas(size)[index] for size in self.march_sizes)
+        missing = np.maximum(needed - self.available, 0)
+        return dict(zip(TROOP_TYPES, missing.tolist()))
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _region(troops: Tuple[int, ...], march_sizes: Tuple[int, ...]) -> FeasibilityRegion:
+    return FeasibilityRegion(TroopCount(*troops), march_sizes)
+
+
+def get_feasibility_region(troops: TroopCount, march_sizes: Tuple[int, ...]) -> FeasibilityRegion:
+    """Return the shared region for these troops and per-march effective sizes, building it on first use."""
+    return _region(astuple(troops), tuple(int(size) for size in march_sizes))
+
+
+def march_shortfalls(troops: TroopCount, march_sizes: Sequence[int],
+                     ratios: Sequence[Optional[Dict[str, float]]]) -> List[Optional[Dict[str, int]]]:
+    """Check each march against the troops the marches before it leave.
+
+    Returns, per march, the troops of each type missing to keep its ratio as set
+    (all zero when it can), or None where the ratio is None; such marches take no
+    troops. A march that keeps its ratio takes its grid quota, so only marches
+    short of troops are planned, with the capped split generate_marches uses.
+    """
+    remaining = list(astuple(troops))
+    shortfalls = []
+    for size, ratio in zip(march_sizes, ratios):
+        if ratio is None:
+            shortfalls.append(None)
+            continue
+        index = grid_index(ratio)
+        weights = to_basis_points(ratio)
+        quota = grid_quotas(size)[index].tolist() if index is not None else largest_remainder(size, weights)
+
+        missing = [max(need - left, 0) for need, left in zip(quota, remaining)]
+        taken = largest_remainder(size, weights, remaining) if any(missing) else quota
+        remaining = [left - used for left, used in zip(remaining, taken)]
+        shortfalls.append(dict(zip(TROOP_TYPES, missing)))
+    return shortfalls
@@ -0,0 +1,209 @@
+# models/formation_registry.py
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from constants import TROOP_TYPES, FORMATIONS_FILE, USER_FORMATIONS_FILE, FORMATION_RELOAD_INTERVAL
+from models.allocation import BASIS_POINTS, to_basis_points
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+class _Compiled(NamedTuple):
+    names: List[str]
+    index: Dict[str, int]
+    basis_points: np.ndarray
+    rows: Dict[str, Tuple[int, ...]]
+
+
+class FormationRegistry:
+    """Formation presets from a config file plus user-defined formations.
+
+    Formations are compiled once into a (formations, types) basis-point array
+    with a name -> row index, and recompiled only when a source file changes.
+    User formations override presets with the same name. If an edited file is
+    unreadable or invalid, the last good table is kept and load_error says why.
+    """
+
+    def __init__(self, preset_path: Path, user_path: Optional[Path] = None):
+        self.preset_path = Path(preset_path)
+        self.user_path = Path(user_path) if user_path else None
+        self._lock = threading.RLock()
+        self._mtimes: Tuple[Optional[float], ...] = ()
+        self._checked_at = 0.0
+        self._compiled = _Compiled([], {}, np.zeros((0, len(TROOP_TYPES)), dtype=np.int64), {})
+        self.load_error: Optional[str] = None
+        try:
+            self.reload()
+        except ValueError:
+            if self.user_path is None:
+                raise
+            # No earlier table to keep: start from the presets alone
+            self._compiled = self._compile_files([self.preset_path])
+
+    @property
+    def names(self) -> List[str]:
+        return self._compiled.names
+
+    @property
+    def index(self) -> Dict[str, int]:
+        return self._compiled.index
+
+    @property
+    def basis_points(self) -> np.ndarray:
+        """(formations, types) int64 basis points, rows in names order."""
+        return self._compiled.basis_points
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, name: str, default: Optional[Dict[str, float]] = None) -> Optional[Dict[str, float]]:
+        """Return the formation as percentages, or default for unknown names."""
+        compiled = self._compiled
+        row = compiled.index.get(name)
+        if row is None:
+            return default
+        return {troop_type: _to_percent(bp) for troop_type, bp in zip(TROOP_TYPES, compiled.basis_points[row].tolist())}
+
+    def basis_points_of(self, name: str,
+                        default: Optional[Tuple[int, ...]] = None) -> Optional[Tuple[int, ...]]:
+        """Return the formation's compiled basis points in TROOP_TYPES order, or default for unknown names."""
+        return self._compiled.rows.get(name, default)
+
+    def table(self) -> Tuple[List[str], np.ndarray]:
+        """Return names and their basis-point rows from the same compiled version."""
+        compiled = self._compiled
+        return compiled.names, compiled.basis_points
+
+    def ratios(self) -> Dict[str, Dict[str, float]]:
+        return {name: self.get(name) for name in self.names}
+
+    def reload(self) -> None:
+        """Recompile from the source files.
+
+        Raises ValueError if a file is unreadable or holds an invalid formation;
+        the current table is then kept and the error stored in load_error.
+        """
+        with self._lock:
+            self._mtimes = self._current_mtimes()
+            self._checked_at = time.monotonic()
+            paths = [self.preset_path] + ([self.user_path] if self.user_path else [])
+            try:
+                compiled = self._compile_files(paths)
+            except ValueError as e:
+                self.load_error = str(e)
+                raise
+            # Swap in the compiled tables in one assignment so readers never see a mix
+            self._compiled = compiled
+            self.load_error = None
+
+    def reload_if_changed(self, min_interval: float = 0.0) -> bool:
+        """Recompile if a source file was edited, added or removed since the last load.
+
+        Files are not checked again until min_interval seconds after the last check.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < min_interval:
+            return False
+        self._checked_at = now
+        if self._current_mtimes() == self._mtimes:
+            return False
+        try:
+            self.reload()
+        except ValueError:
+            # Keep serving the last good table until the file is fixed
+            return False
+        return True
+
+    def save_user_formation(self, name: str, ratio: Dict[str, float]) -> None:
+        """Add or replace a user-defined formation and recompile."""
+        if self.user_path is None:
+            raise ValueError("No user formations file configured.")
+        self._compile(name, ratio)
+
+        with self._lock:
+            formations = self._read(self.user_path)
+            formations[name] = {troop_type: ratio[troop_type] for troop_type in TROOP_TYPES}
+
+            # Write a temporary file and swap it in, so readers never see a partial file
+            handle, temp_path = tempfile.mkstemp(dir=self.user_path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(formations, indent=2) + '\n')
+                os.replace(temp_path, self.user_path)
+            except OSError:
+                os.remove(temp_path)
+                raise
+            self.reload()
+
+    def _current_mtimes(self) -> Tuple[Optional[float], ...]:
+        paths = [self.preset_path] + ([self.user_path] if self.user_path else [])
+        return tuple(os.stat(path).st_mtime if path.exists() else None for path in paths)
+
+    def _compile_files(self, paths: List[Path]) -> _Compiled:
+        formations = {}
+        for path in paths:
+            formations.update(self._read(path))
+
+        names = list(formations)
+        rows = {name: tuple(self._compile(name, formations[name])) for name in names}
+        basis_points = np.array([rows[name] for name in names], dtype=np.int64).reshape(len(names), len(TROOP_TYPES))
+        return _Compiled(names, {name: i for i, name in enumerate(names)}, basis_points, rows)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Dict[str, float]]:
+        if not path.exists():
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                formations = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Could not read {path.name}: {e}") from e
+        if not isinstance(formations, dict):
+            raise ValueError(f"{path.name} must map formation names to ratios.")
+        return formations
+
+    @staticmethod
+    def _compile(name: str, ratio: Dict[str, float]) -> List[int]:
+        try:
+            basis_points = to_basis_points(ratio)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Formation {name!r} must give a percentage for {', '.join(TROOP_TYPES)}.") from e
+        if sum(basis_points) != BASIS_POINTS or min(basis_points) < 0:
+            raise ValueError(f"Formation {name!r} ratios must total 100%.")
+        return basis_points
+
+
+def _to_percent(basis_points: int) -> float:
+    percent, remainder = divmod(basis_points * 100, BASIS_POINTS)
+    return percent if remainder == 0 else basis_points * 100 / BASIS_POINTS
+
+
+_registry: Optional[FormationRegistry] = None
+
+
+def get_registry() -> FormationRegistry:
+    """Return the shared registry, reloading it first if its config files changed.
+
+    The files are checked at most once every FORMATION_RELOAD_INTERVAL seconds;
+    call reload() on the registry to pick up an edit immediately.
+    """
+    global _registry
+    if _registry is None:
+        _registry = FormationRegistry(ROOT_DIR / FORMATIONS_FILE, ROOT_DIR / USER_FORMATIONS_FILE)
+    else:
+        _registry.reload_if_changed(FORMATION_RELOAD_INTERVAL)
+    return _registry
+
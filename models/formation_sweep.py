@@ -0,0 +1,80 @@
+# models/formation_sweep.py
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.allocation import BASIS_POINTS
+from models.formation_registry import FormationRegistry
+from models.ratio_solver import solve_ratio_array
+from models.troop_count import TroopCount
+
+
+@dataclass
+class SweepResult:
+    formation: str
+    num_marches: int
+    fill_rate: float
+    distance: Optional[float]
+    feasible: bool
+    ratio: Optional[Dict[str, float]]
+
+    def to_row(self) -> Dict[str, object]:
+        row = {
+            'Formation': self.formation,
+            'Marches': self.num_marches,
+            'Fill %': round(self.fill_rate * 100, 2),
+            'Distance (pp)': self.distance,
+        }
+        for troop_type in TROOP_TYPES:
+            row[f"{troop_type.capitalize()} %"] = self.ratio[troop_type] if self.ratio else None
+        return row
+
+
+def sweep_formations(troops: TroopCount, effective_march_size: int, registry: FormationRegistry,
+                     march_counts: Iterable[int] = range(1, 8)) -> List[SweepResult]:
+    """Rank every formation x march count by fill rate, then by distance from the formation.
+
+    Combinations needing more troops than exist in total are pruned before
+    solving: they are reported with their partial fill rate and no ratio. The
+    rest are solved together with the vectorized water-filling solver.
+    """
+    names, basis_points = registry.table()
+    march_counts = np.array(list(march_counts), dtype=np.int64)
+    available = np.array([troops.to_dict()[troop_type] for troop_type in TROOP_TYPES], dtype=np.int64)
+    targets = basis_points * 100 / BASIS_POINTS
+
+    # One row per (formation, march count)
+    formation_index = np.repeat(np.arange(len(names)), len(march_counts))
+    row_marches = np.tile(march_counts, len(names))
+    needed = row_marches * effective_march_size
+    total_available = int(available.sum())
+
+    fill_rate = np.minimum(total_available / np.maximum(needed, 1), 1.0)
+    solvable = needed <= total_available
+
+    ratios = np.zeros((len(row_marches), len(TROOP_TYPES)))
+    distances = np.full(len(row_marches), np.nan)
+    if solvable.any():
+        rows = np.nonzero(solvable)[0]
+        solved, gaps, _ = solve_ratio_array(targets[formation_index[rows]],
+                                            np.broadcast_to(available, (len(rows), len(TROOP_TYPES))),
+                                            needed[rows])
+        ratios[rows] = solved
+        distances[rows] = gaps
+
+    results = [
+        SweepResult(
+            formation=names[formation_index[i]],
+            num_marches=int(row_marches[i]),
+            fill_rate=float(fill_rate[i]),
+            distance=float(distances[i]) if solvable[i] else None,
+            feasible=bool(solvable[i]),
+            ratio=dict(zip(TROOP_TYPES, ratios[i].tolist())) if solvable[i] else None,
+        )
+        for i in range(len(row_marches))
+    ]
+
+    results.sort(key=lambda r: (-r.fill_rate, r.distance if r.feasible else float('inf'), -r.num_marches))
+    return results
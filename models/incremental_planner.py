@@ -0,0 +1,109 @@
+# models/incremental_planner.py
+from dataclasses import astuple
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.allocation import largest_remainder, to_basis_points
+from models.troop_count import TroopCount
+
+
+class IncrementalPlanner:
+    """Keeps a march plan and updates it for troop deltas or single-march ratio changes.
+
+    Marches deplete troops in order, so each march only depends on the troops
+    left after the earlier ones. A march whose unconstrained split (its quota)
+    still fits in what is left is unaffected by a change and is not recomputed.
+    The plan always equals TroopManager.generate_marches for the current inputs.
+    """
+
+    def __init__(self, march_sizes, troops: TroopCount, ratios: List[Dict[str, float]]):
+        """march_sizes is one effective size for every march or one per march."""
+        num_marches = len(ratios)
+        self.march_sizes = np.broadcast_to(np.asarray(march_sizes, dtype=np.int64), (num_marches,)).copy()
+        self.troops = np.array(astuple(troops), dtype=np.int64)
+
+        self._weights = [[0] * len(TROOP_TYPES) for _ in range(num_marches)]
+        self._quotas = np.zeros((num_marches, len(TROOP_TYPES)), dtype=np.int64)
+        self._counts = np.zeros((num_marches, len(TROOP_TYPES)), dtype=np.int64)
+        self._consumed = np.zeros((num_marches + 1, len(TROOP_TYPES)), dtype=np.int64)
+        self._constrained = np.ones(num_marches, dtype=bool)
+
+        for i, ratio in enumerate(ratios):
+            self._set_weights(i, ratio)
+        self._replan(0)
+
+    @property
+    def num_marches(self) -> int:
+        return len(self._counts)
+
+    @property
+    def marches(self) -> List[Dict[str, int]]:
+        marches = []
+        for counts in self._counts.tolist():
+            march = dict(zip(TROOP_TYPES, counts))
+            march['total'] = sum(counts)
+            marches.append(march)
+        return marches
+
+    def apply_delta(self, delta: TroopCount) -> List[int]:
+        """Add a (possibly negative) troop delta and return the indices of the marches replanned."""
+        troops = self.troops + np.array(astuple(delta), dtype=np.int64)
+        if (troops < 0).any():
+            raise ValueError("Troop counts cannot be negative.")
+        self.troops = troops
+
+        first = self._next_affected(0)
+        return [] if first is None else self._replan(first)
+
+    def set_ratio(self, index: int, ratio: Dict[str, float]) -> List[int]:
+        """Change one march's ratio and return the indices of the marches replanned."""
+        self._set_weights(index, ratio)
+        return self._replan(index, force=index)
+
+    def _set_weights(self, index: int, ratio: Dict[str, float]) -> None:
+        if round(sum(ratio[troop_type] for troop_type in TROOP_TYPES), 2) != 100.0:
+            raise ValueError(f"March {index + 1} ratios must total 100%.")
+        self._weights[index] = to_basis_points(ratio)
+        self._quotas[index] = largest_remainder(int(self.march_sizes[index]), self._weights[index])
+
+    def _next_affected(self, start: int) -> Optional[int]:
+        """Return the first march from start on whose stored split may no longer hold."""
+        remaining = self.troops - self._consumed[start:-1]
+        affected = self._constrained[start:] | (self._quotas[start:] > remaining).any(axis=1)
+        return start + int(np.argmax(affected)) if affected.any() else None
+
+    def _replan(self, start: int, force: int = -1) -> List[int]:
+        replanned = []
+        consumed = self._consumed[start].copy()
+        i = start
+
+        while i < self.num_marches:
+            remaining = self.troops - consumed
+            fits = not self._constrained[i] and (self._quotas[i] <= remaining).all()
+
+            if i != force and fits:
+                if (consumed == self._consumed[i]).all():
+                    # Same prefix and same split: skip to the next march the change reaches
+                    following = self._next_affected(i + 1)
+                    if following is None:
+                        return replanned
+                    i = following
+                    consumed = self._consumed[i].copy()
+                    continue
+                # Unconstrained march: its split is the quota whatever is left over
+                counts = self._quotas[i]
+            else:
+                counts = np.array(largest_remainder(int(self.march_sizes[i]), self._weights[i],
+                                                    remaining.tolist()), dtype=np.int64)
+                self._constrained[i] = (counts != self._quotas[i]).any()
+                replanned.append(i)
+
+            self._counts[i] = counts
+            self._consumed[i] = consumed
+            consumed = consumed + counts
+            i += 1
+
+        self._consumed[-1] = consumed
+        return replanned
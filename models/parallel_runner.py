@@ -0,0 +1,85 @@
+# models/parallel_runner.py
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from models.scenario import Scenario, plan_scenario, plan_scenarios
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+def _chunks(scenarios: Iterable[Scenario], chunk_size: int) -> Iterator[List[Scenario]]:
+    iterator = iter(scenarios)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _check_pool_args(workers: Optional[int], chunk_size: int) -> None:
+    if workers is not None and workers < 0:
+        raise ValueError("workers must not be negative.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+
+
+def _plan_chunk(chunk: List[Scenario]) -> List[Dict[str, Any]]:
+    return [plan_scenario(scenario) for scenario in chunk]
+
+
+def plan_scenarios_parallel(scenarios: Iterable[Scenario], workers: Optional[int] = None,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Plan scenarios across a process pool, yielding results in input order.
+
+    Scenarios are sent to workers in chunks so each task pickles many
+    TroopCount/BuffConfiguration objects at once. Only a few chunks per worker
+    are in flight at a time, so memory stays bounded for streamed input.
+    Raises ValueError straight away if workers is negative or chunk_size is below 1.
+    """
+    _check_pool_args(workers, chunk_size)
+    return _plan_parallel(scenarios, workers or os.cpu_count() or 1, chunk_size)
+
+
+def _plan_parallel(scenarios: Iterable[Scenario], workers: int, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    if workers == 1:
+        yield from plan_scenarios(scenarios)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(scenarios, chunk_size):
+            pending.append(executor.submit(_plan_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def scaling_report(scenarios: List[Scenario], max_workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, float]]:
+    """Time the same scenario batch with 1..max_workers processes."""
+    _check_pool_args(max_workers, chunk_size)
+    max_workers = max_workers or os.cpu_count() or 1
+    report = []
+    baseline = None
+
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        for _ in plan_scenarios_parallel(scenarios, workers, chunk_size):
+            pass
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        report.append({
+            'workers': workers,
+            'seconds': round(elapsed, 4),
+            'scenarios_per_second': round(len(scenarios) / elapsed, 1) if elapsed else 0.0,
+            'speedup': round(baseline / elapsed, 2) if elapsed else 0.0,
+            'efficiency': round(baseline / elapsed / workers, 2) if elapsed else 0.0,
+        })
+
+    return report
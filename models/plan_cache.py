@@ -0,0 +1,59 @@
+# models/plan_cache.py
+import copy
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Union
+
+from constants import TROOP_TYPES
+from models.troop_count import TroopCount
+
+
+def plan_key(method: str, march_sizes: Tuple[int, ...], troops: TroopCount,
+             ratios: Union[str, Tuple[int, ...], List[Dict[str, float]]], num_marches: int) -> Hashable:
+    """Build a hashable cache key for one planning call, given each march's effective size.
+
+    ratios is a list of per-march ratios, or an already hashable str or basis-point tuple.
+    """
+    if not isinstance(ratios, (str, tuple)):
+        ratios = tuple(tuple(r[troop_type] for troop_type in TROOP_TYPES) for r in ratios[:num_marches])
+    return method, march_sizes, astuple(troops), ratios, num_marches
+
+
+class PlanCache:
+    """Thread-safe LRU cache for planning results with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key])
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return copy.deepcopy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
@@ -0,0 +1,112 @@
+# models/rally_planner.py
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from constants import TROOP_TYPES
+from models.allocation import largest_remainder, to_basis_points
+from models.buff_index import effective_march_sizes
+from models.buffs import BuffConfiguration
+from models.troop_count import TroopCount
+
+
+@dataclass
+class RallyJoiner:
+    name: str
+    troops: TroopCount
+    base_march_size: int
+    buffs: BuffConfiguration = field(default_factory=lambda: BuffConfiguration(0, 0, 0))
+
+    @property
+    def march_size(self) -> int:
+        return self.buffs.calculate_total_buff(self.base_march_size)
+
+
+@dataclass
+class RallyPlan:
+    capacity: int
+    target: Dict[str, int]
+    totals: Dict[str, int]
+    contributions: List[Dict[str, int]]
+
+    @property
+    def total(self) -> int:
+        return sum(self.totals.values())
+
+    @property
+    def fill_rate(self) -> float:
+        return self.total / self.capacity if self.capacity else 0.0
+
+
+def plan_rally(capacity: int, ratio: Dict[str, float], joiners: List[RallyJoiner]) -> RallyPlan:
+    """Assign joiner contributions so the rally fills its capacity at the target ratio.
+
+    The rally is split across troop types with the shared allocator, capped by
+    what the joiners hold in total. Types are then filled scarcest first: for
+    each type a max-heap hands the need to the joiners who can send the most of
+    it, limited by their troops and what is left of their march size. If march
+    sizes block part of the split, the leftover is split again over the troops
+    still reachable, so each round is O(n log n) in the number of joiners.
+    """
+    if round(sum(ratio[troop_type] for troop_type in TROOP_TYPES), 2) != 100.0:
+        raise ValueError("Rally ratios must total 100%.")
+
+    available = [[getattr(joiner.troops, troop_type) for troop_type in TROOP_TYPES] for joiner in joiners]
+    room = effective_march_sizes([joiner.base_march_size for joiner in joiners],
+                                 [joiner.buffs.pet_buff for joiner in joiners],
+                                 [joiner.buffs.city_buff for joiner in joiners],
+                                 [joiner.buffs.minister_buff for joiner in joiners]).tolist()
+    contributions = [[0] * len(TROOP_TYPES) for _ in joiners]
+    weights = to_basis_points(ratio)
+
+    supply = [sum(counts[t] for counts in available) for t in range(len(TROOP_TYPES))]
+    fillable = min(capacity, sum(min(sum(counts), space) for counts, space in zip(available, room)))
+    target = largest_remainder(fillable, weights, supply)
+    assigned = [0] * len(TROOP_TYPES)
+
+    need = target
+    while sum(need) > 0:
+        # Scarcest type first: the largest share of its remaining supply is needed
+        order = sorted((t for t in range(len(TROOP_TYPES)) if need[t] > 0),
+                       key=lambda t: -need[t] / max(supply[t], 1))
+        progress = 0
+        for t in order:
+            given = _fill_type(t, need[t], available, room, contributions)
+            assigned[t] += given
+            supply[t] -= given
+            progress += given
+        if progress == 0:
+            break
+
+        # Split what is still missing over the troops that can still be sent
+        leftover = fillable - sum(assigned)
+        reachable = [sum(min(counts[t], space) for counts, space in zip(available, room))
+                     for t in range(len(TROOP_TYPES))]
+        need = largest_remainder(leftover, weights, reachable)
+
+    totals = dict(zip(TROOP_TYPES, assigned))
+    plans = []
+    for counts in contributions:
+        plan = dict(zip(TROOP_TYPES, counts))
+        plan['total'] = sum(counts)
+        plans.append(plan)
+
+    return RallyPlan(capacity, dict(zip(TROOP_TYPES, target)), totals, plans)
+
+
+def _fill_type(t: int, need: int, available: List[List[int]], room: List[int],
+               contributions: List[List[int]]) -> int:
+    heap = [(-min(counts[t], space), i) for i, (counts, space) in enumerate(zip(available, room))
+            if counts[t] > 0 and space > 0]
+    heapq.heapify(heap)
+
+    given = 0
+    while heap and given < need:
+        amount, i = heapq.heappop(heap)
+        give = min(-amount, need - given)
+        available[i][t] -= give
+        room[i] -= give
+        contributions[i][t] += give
+        given += give
+
+    return given
@@ -0,0 +1,129 @@
+# models/ratio_solver.py
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.allocation import BASIS_POINTS, largest_remainder, largest_remainder_array
+
+
+@dataclass
+class RatioSolution:
+    ratio: Dict[str, float]
+    # Total absolute deviation from the target (L1), in percentage points
+    gap: float
+    feasible: bool
+
+
+def solve_ratio(target: Dict[str, float], available: Dict[str, int], total_needed: int) -> RatioSolution:
+    """Find the ratio closest to target that the available troops can fill.
+
+    The ratio is the Euclidean projection of the target onto the troop caps,
+    found by water-filling: each type gets clip(target + level, 0, available) and
+    the level is found with one sweep over the sorted breakpoints. The projection
+    minimises the squared (L2) distance to the target, while the reported gap is
+    the total absolute (L1) deviation in percentage points. The projection is
+    also L1-optimal: it lowers only the types capped below their target and
+    raises the others, so the gap is twice the capped shortfall, up to rounding.
+
+    A feasible ratio never asks for more of a type than is available: each
+    type's basis points are limited to floor(available * 10000 / total_needed),
+    and the rounding slack goes to the types below their limit.
+    """
+    caps = [available[troop_type] for troop_type in TROOP_TYPES]
+
+    if total_needed <= 0 or sum(caps) < total_needed:
+        # Not enough troops to fill every march: send everything we have
+        counts = [float(cap) for cap in caps]
+        return _to_solution(target, counts, caps, sum(caps), feasible=False)
+
+    wanted = [target[troop_type] / 100 * total_needed for troop_type in TROOP_TYPES]
+
+    events = []
+    for want, cap in zip(wanted, caps):
+        events.append((-want, 1))
+        events.append((cap - want, -1))
+    events.sort()
+
+    filled, slope, level = 0.0, 0, events[0][0]
+    for point, delta in events:
+        reached = filled + slope * (point - level)
+        if reached >= total_needed:
+            level += (total_needed - filled) / slope
+            break
+        filled, level, slope = reached, point, slope + delta
+
+    counts = [min(max(want + level, 0.0), cap) for want, cap in zip(wanted, caps)]
+    return _to_solution(target, counts, caps, total_needed, feasible=True)
+
+
+def _to_solution(target: Dict[str, float], counts, caps, total: int, feasible: bool) -> RatioSolution:
+    if total == 0:
+        return RatioSolution({troop_type: 0 for troop_type in TROOP_TYPES}, 0.0, False)
+
+    weights = [int(round(count * BASIS_POINTS)) for count in counts]
+    if not feasible:
+        basis_points = largest_remainder(BASIS_POINTS, weights)
+    else:
+        # Floored limits keep every quota within its cap; the allocator re-splits
+        # what a capped type cannot take over the uncapped ones
+        basis_points = largest_remainder(BASIS_POINTS, weights, [cap * BASIS_POINTS // total for cap in caps])
+        slack = BASIS_POINTS - sum(basis_points)
+        if slack:
+            # Every type sits at its limit: the last basis points go where the cap is overshot least
+            extra = largest_remainder(slack, [cap * BASIS_POINTS % total for cap in caps])
+            basis_points = [bp + more for bp, more in zip(basis_points, extra)]
+
+    ratio = {troop_type: bp / 100 for troop_type, bp in zip(TROOP_TYPES, basis_points)}
+    gap = round(sum(abs(ratio[troop_type] - target[troop_type]) for troop_type in TROOP_TYPES), 2)
+    return RatioSolution(ratio, gap, feasible)
+
+
+def solve_ratio_array(target, available, total_needed) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized solve_ratio over a roster.
+
+    target: (types,) or (rows, types) percentages.
+    available: (rows, types) troop counts.
+    total_needed: scalar or (rows,) troops needed to fill every march.
+
+    Returns (ratios in percent, gaps, feasible flags) with shapes
+    (rows, types), (rows,) and (rows,).
+    """
+    caps = np.asarray(available, dtype=np.int64)
+    num_rows, size = caps.shape
+    target = np.broadcast_to(np.asarray(target, dtype=np.float64), (num_rows, size))
+    needed = np.broadcast_to(np.asarray(total_needed, dtype=np.int64), (num_rows,))
+
+    cap_total = caps.sum(axis=1)
+    feasible = (needed > 0) & (cap_total >= needed)
+
+    wanted = target / 100 * needed[:, None]
+    points = np.sort(np.concatenate([-wanted, caps - wanted], axis=1), axis=1)
+
+    # f(level) = sum(clip(wanted + level, 0, caps)) at every breakpoint
+    filled = np.clip(wanted[:, None, :] + points[:, :, None], 0, caps[:, None, :]).sum(axis=2)
+    upper = np.argmax(filled >= needed[:, None], axis=1)
+    lower = np.maximum(upper - 1, 0)
+
+    rows = np.arange(num_rows)
+    f_low, f_high = filled[rows, lower], filled[rows, upper]
+    p_low, p_high = points[rows, lower], points[rows, upper]
+    span = np.where(f_high > f_low, f_high - f_low, 1)
+    level = np.where(f_high > f_low, p_low + (needed - f_low) / span * (p_high - p_low), p_high)
+
+    counts = np.clip(wanted + level[:, None], 0, caps)
+    counts = np.where(feasible[:, None], counts, caps)
+    total = np.where(feasible, needed, cap_total)
+
+    safe_total = np.maximum(total, 1)[:, None]
+    weights = np.rint(counts * BASIS_POINTS).astype(np.int64)
+    limits = np.where(feasible[:, None], caps * BASIS_POINTS // safe_total, np.iinfo(np.int64).max)
+    basis_points = largest_remainder_array(np.where(total > 0, BASIS_POINTS, 0), weights, limits)
+    slack = np.where(feasible, BASIS_POINTS - basis_points.sum(axis=1), 0)
+    basis_points += largest_remainder_array(slack, caps * BASIS_POINTS % safe_total)
+
+    ratios = basis_points / 100
+    gaps = np.round(np.abs(ratios - target).sum(axis=1), 2)
+    gaps = np.where(total > 0, gaps, 0.0)
+    return ratios, gaps, feasible
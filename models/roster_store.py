@@ -0,0 +1,166 @@
+# models/roster_store.py
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from constants import TROOP_TYPES, TROOP_TIERS
+from models.buff_index import effective_march_sizes
+from models.buffs import BuffConfiguration
+from models.troop_inventory import TroopInventory
+
+MAGIC = b'TROSTER\x00'
+VERSION = 1
+NAME_BYTES = 32
+
+RECORD_DTYPE = np.dtype([
+    ('name', f'S{NAME_BYTES}'),
+    ('base_march_size', '<i8'),
+    ('pet_buff', '<i8'),
+    ('city_buff', '<i8'),
+    ('minister_buff', '<i8'),
+    ('troops', '<i8', (len(TROOP_TYPES),)),
+    ('tiers', '<i8', (len(TROOP_TYPES), len(TROOP_TIERS))),
+])
+
+# magic, version, record size, types, tiers
+_HEADER = struct.Struct('<8sIIII')
+
+
+class RosterStore:
+    """Accounts saved as fixed-width binary records and read through a memory map.
+
+    The file is a small header followed by one RECORD_DTYPE record per account.
+    Field views such as troops() and tiers() point straight into the mapped file,
+    so they can be handed to the batch planners without copying. Saving an
+    account overwrites its record in place or appends one at the end, under a
+    thread lock and an exclusive file lock so concurrent saves cannot collide.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._records: Optional[np.memmap] = None
+        self._index: Dict[str, int] = {}
+        self._size = -1
+        self._lock = threading.RLock()
+        if not self.path.exists():
+            self.path.write_bytes(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize,
+                                               len(TROOP_TYPES), len(TROOP_TIERS)))
+        self._check_header()
+
+    @property
+    def records(self) -> np.ndarray:
+        """Read-only (accounts,) structured view of the file."""
+        return self._refresh()
+
+    def _refresh(self) -> np.ndarray:
+        """Remap the file if its size changed since the last read."""
+        with self._lock:
+            size = os.stat(self.path).st_size
+            if size != self._size:
+                count = (size - _HEADER.size) // RECORD_DTYPE.itemsize
+                if count:
+                    self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r',
+                                              offset=_HEADER.size, shape=(count,))
+                else:
+                    self._records = np.zeros(0, dtype=RECORD_DTYPE)
+                # Records are only ever appended or rewritten under the same name,
+                # so only names past the ones already indexed need decoding
+                start = len(self._index) if size > self._size else 0
+                if start == 0:
+                    self._index = {}
+                for i, name in enumerate(self._records['name'][start:].tolist(), start):
+                    self._index[name.decode('utf-8')] = i
+                self._size = size
+            return self._records
+
+    @property
+    def names(self) -> List[str]:
+        self._refresh()
+        return list(self._index)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        self._refresh()
+        return name in self._index
+
+    def troops(self) -> np.ndarray:
+        """(accounts, types) troop totals, a view into the mapped file."""
+        return self.records['troops']
+
+    def tiers(self) -> np.ndarray:
+        """(accounts, types, tiers) troops per tier, a view into the mapped file."""
+        return self.records['tiers']
+
+    def effective_march_sizes(self) -> np.ndarray:
+        records = self.records
+        return effective_march_sizes(records['base_march_size'], records['pet_buff'],
+                                     records['city_buff'], records['minister_buff'])
+
+    def load(self, name: str) -> Tuple[int, BuffConfiguration, TroopInventory]:
+        """Return the base march size, buffs and tiered inventory saved for an account."""
+        records = self._refresh()
+        if name not in self._index:
+            raise KeyError(f"No saved account named {name!r}.")
+        record = records[self._index[name]]
+        buffs = BuffConfiguration(int(record['pet_buff']), int(record['city_buff']), int(record['minister_buff']))
+        return int(record['base_march_size']), buffs, TroopInventory(np.array(record['tiers']))
+
+    def save(self, name: str, base_march_size: int, buffs: BuffConfiguration, inventory: TroopInventory) -> None:
+        """Write an account's record in place, or append it if the name is new."""
+        encoded = name.encode('utf-8')
+        if not name or len(encoded) > NAME_BYTES:
+            raise ValueError(f"Account names must be 1 to {NAME_BYTES} bytes long.")
+
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record['name'] = encoded
+        record['base_march_size'] = base_march_size
+        record['pet_buff'] = buffs.pet_buff
+        record['city_buff'] = buffs.city_buff
+        record['minister_buff'] = buffs.minister_buff
+        record['tiers'] = inventory.counts
+        record['troops'] = inventory.counts.sum(axis=1)
+
+        with self._lock, open(self.path, 'r+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Look the name up and find the end of the file while holding both locks
+                self._refresh()
+                row = self._index.get(name)
+                if row is None:
+                    count = (os.fstat(f.fileno()).st_size - _HEADER.size) // RECORD_DTYPE.itemsize
+                    f.seek(_HEADER.size + count * RECORD_DTYPE.itemsize)
+                else:
+                    f.seek(_HEADER.size + row * RECORD_DTYPE.itemsize)
+                f.write(record.tobytes())
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+            if row is not None:
+                # An in-place update keeps the file size, so force the next read to remap
+                self._size = -1
+
+    def _check_header(self) -> None:
+        with open(self.path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{self.path} is not a roster file.")
+        magic, version, record_size, types, tiers = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a roster file.")
+        if (version, record_size, types, tiers) != (VERSION, RECORD_DTYPE.itemsize,
+                                                    len(TROOP_TYPES), len(TROOP_TIERS)):
+            raise ValueError(f"{self.path} was written by an incompatible roster format.")
@@ -0,0 +1,128 @@
+# models/scenario.py
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+from constants import TROOP_TYPES, PET_BUFF_LEVELS, MINISTER_BUFF_VALUE, MAX_MARCHES, MAX_COUNT
+from models.buffs import BuffConfiguration
+from models.formation_registry import get_registry
+from models.troop_count import TroopCount
+from models.troop_manager import TroopManager
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+@dataclass
+class Scenario:
+    scenario_id: str
+    base_march_size: int
+    buffs: BuffConfiguration
+    troops: TroopCount
+    formation: str
+    num_marches: int
+    error: Optional[str] = None
+
+    @classmethod
+    def invalid(cls, scenario_id: str, error: str) -> 'Scenario':
+        """A row that could not be parsed, planned as an error record."""
+        return cls(scenario_id, 0, BuffConfiguration(0, 0, 0), TroopCount(0, 0, 0), '', 0, error)
+
+
+def _parse_pet_buff(value: Any) -> int:
+    if value in (None, ''):
+        return 0
+    if isinstance(value, str) and value in PET_BUFF_LEVELS:
+        return PET_BUFF_LEVELS[value]
+    return int(value)
+
+
+def _parse_flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def parse_scenario(row: Mapping[str, Any], line_number: int = 0) -> Scenario:
+    """Build a scenario from one roster row (a CSV or JSONL record)."""
+    if not isinstance(row, Mapping):
+        raise ValueError("Not a JSON object.")
+
+    def count(key: str) -> int:
+        value = row.get(key)
+        value = int(value) if value not in (None, '') else 0
+        if value < 0:
+            raise ValueError(f"{key} must not be negative.")
+        if value > MAX_COUNT:
+            raise ValueError(f"{key} must be at most {MAX_COUNT}.")
+        return value
+
+    base_march_size = count('base_march_size')
+    if base_march_size <= 0:
+        raise ValueError("base_march_size is required and must be positive.")
+    formation = row.get('formation') or 'Balanced'
+    if formation not in get_registry():
+        raise ValueError(f"Unknown formation {formation!r}.")
+
+    num_marches = count('num_marches') or 1
+    if num_marches > MAX_MARCHES:
+        raise ValueError(f"num_marches must be at most {MAX_MARCHES}.")
+
+    troops = TroopCount(**{
+        troop_type: count(f"{troop_type}_t10") + count(f"{troop_type}_t11") + count(troop_type)
+        for troop_type in TROOP_TYPES
+    })
+    if max(troops.infantry, troops.lancer, troops.marksman) > MAX_COUNT:
+        raise ValueError(f"Troop counts must be at most {MAX_COUNT}.")
+    buffs = BuffConfiguration(
+        pet_buff=_parse_pet_buff(row.get('pet_buff')),
+        city_buff=count('city_buff'),
+        minister_buff=MINISTER_BUFF_VALUE if _parse_flag(row.get('minister_buff', '')) else 0,
+    )
+    if not 0 <= buffs.pet_buff <= MAX_COUNT or buffs.city_buff > 100:
+        raise ValueError("Buffs must be non-negative and the city buff at most 100%.")
+
+    return Scenario(
+        scenario_id=str(row.get('id') or line_number),
+        base_march_size=base_march_size,
+        buffs=buffs,
+        troops=troops,
+        formation=formation,
+        num_marches=num_marches,
+    )
+
+
+def plan_scenario(scenario: Scenario) -> Dict[str, Any]:
+    """Optimize the formation ratio for a scenario and generate its marches."""
+    if scenario.error is not None:
+        return {'id': scenario.scenario_id, 'error': scenario.error}
+    try:
+        manager = TroopManager(scenario.base_march_size, scenario.buffs)
+        ratio = manager.optimize_ratio(scenario.num_marches, scenario.troops, scenario.formation)
+        if sum(ratio.values()) == 0:
+            raise ValueError("No troops available.")
+        marches = manager.generate_marches(scenario.num_marches, scenario.troops,
+                                           [ratio] * scenario.num_marches)
+    except ValueError as e:
+        return {'id': scenario.scenario_id, 'error': str(e)}
+
+    return {
+        'id': scenario.scenario_id,
+        'effective_march_size': manager.effective_march_size,
+        'formation': scenario.formation,
+        'ratio': ratio,
+        'marches': marches,
+    }
+
+
+def parse_scenarios(rows: Iterable[Mapping[str, Any]]) -> Iterator[Scenario]:
+    """Parse rows one by one; a row that fails to parse becomes an error record instead of ending the run."""
+    for line_number, row in enumerate(rows, 1):
+        try:
+            yield parse_scenario(row, line_number)
+        except (TypeError, ValueError) as e:
+            scenario_id = row.get('id') if isinstance(row, Mapping) else None
+            yield Scenario.invalid(str(scenario_id or line_number), f"Row {line_number}: {e}")
+
+
+def plan_scenarios(scenarios: Iterable[Scenario]) -> Iterator[Dict[str, Any]]:
+    for scenario in scenarios:
+        yield plan_scenario(scenario)
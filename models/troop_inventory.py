@@ -0,0 +1,71 @@
+# models/troop_inventory.py
+from typing import Dict, Optional
+
+import numpy as np
+
+from constants import TROOP_TYPES, TROOP_TIERS
+from models.troop_count import TroopCount
+
+
+class TroopInventory:
+    """Troop counts per type and tier, stored as a (types, tiers) int64 matrix.
+
+    Rows follow TROOP_TYPES and columns follow TROOP_TIERS (T1..T11).
+    """
+    __slots__ = ('counts',)
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        if counts is None:
+            counts = np.zeros((len(TROOP_TYPES), len(TROOP_TIERS)), dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        if self.counts.shape != (len(TROOP_TYPES), len(TROOP_TIERS)):
+            raise ValueError(f"Inventory must have shape ({len(TROOP_TYPES)}, {len(TROOP_TIERS)}).")
+
+    @classmethod
+    def from_tiers(cls, tiers: Dict[int, Dict[str, int]]) -> 'TroopInventory':
+        """Build an inventory from {tier: {troop_type: count}}."""
+        inventory = cls()
+        for tier, counts in tiers.items():
+            for troop_type, count in counts.items():
+                inventory.set(troop_type, tier, count)
+        return inventory
+
+    def get(self, troop_type: str, tier: int) -> int:
+        return int(self.counts[TROOP_TYPES.index(troop_type), _tier_column(tier)])
+
+    def set(self, troop_type: str, tier: int, count: int) -> None:
+        if count < 0:
+            raise ValueError("Troop counts cannot be negative.")
+        self.counts[TROOP_TYPES.index(troop_type), _tier_column(tier)] = count
+
+    def to_troop_count(self) -> TroopCount:
+        return TroopCount(*(int(total) for total in self.counts.sum(axis=1)))
+
+
+def _tier_column(tier: int) -> int:
+    # Checked explicitly: tier - TROOP_TIERS[0] would wrap tier 0 round to T11
+    if tier not in TROOP_TIERS:
+        raise ValueError(f"Unknown troop tier {tier!r}; expected T{TROOP_TIERS[0]} to T{TROOP_TIERS[-1]}.")
+    return TROOP_TIERS.index(tier)
+
+
+def fill_highest_tier_first(march_counts: np.ndarray, tier_counts: np.ndarray) -> np.ndarray:
+    """Split planned marches into tiers, drawing each type from its highest tier down.
+
+    march_counts: (..., marches, types) troops per march, in march order.
+    tier_counts: (..., types, tiers) available troops per tier.
+
+    Marches consume each type in order, so march m takes the slice
+    [sum of earlier marches, sum including m) of that type's troops ranked from
+    T11 down. Returns a (..., marches, types, tiers) array of the overlaps.
+    """
+    march_counts = np.asarray(march_counts, dtype=np.int64)
+    strongest_first = np.asarray(tier_counts, dtype=np.int64)[..., ::-1]
+
+    march_end = np.cumsum(march_counts, axis=-2)[..., None]
+    march_start = march_end - march_counts[..., None]
+    tier_end = np.cumsum(strongest_first, axis=-1)[..., None, :, :]
+    tier_start = tier_end - strongest_first[..., None, :, :]
+
+    overlap = np.minimum(march_end, tier_end) - np.maximum(march_start, tier_start)
+    return np.clip(overlap, 0, None)[..., ::-1]
@@ -1,157 +1,191 @@
 # models/troop_manager.py
-from typing import Dict, List
-from constants import TROOP_TYPES, MAX_PERCENTAGE
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constants import TROOP_TYPES, MAX_PERCENTAGE, DEFAULT_FORMATION_RATIO
+from instrumentation import timed
 from models.troop_count import TroopCount
+from models.troop_inventory import TroopInventory, fill_highest_tier_first
 from models.buffs import BuffConfiguration
-import math
+from models.buff_index import get_buff_index, effective_march_sizes
+from models.allocation import largest_remainder, to_basis_points
+from models.ratio_solver import RatioSolution, solve_ratio
+from models.formation_registry import get_registry
+from models.formation_sweep import SweepResult, sweep_formations
+from models.incremental_planner import IncrementalPlanner
+from models.rally_planner import RallyJoiner, RallyPlan, plan_rally
+from models.feasibility import FeasibilityRegion, get_feasibility_region
+from models.wave_simulation import HealModel, LossModel, WaveSummary, simulate_waves
+from models.plan_cache import PlanCache, plan_key
+
+DEFAULT_FORMATION_BASIS_POINTS = tuple(to_basis_points(DEFAULT_FORMATION_RATIO))
+
 
 class TroopManager:
-    def __init__(self, max_march_size: int, buffs: BuffConfiguration):
+    @timed()
+    def __init__(self, max_march_size: int, buffs: BuffConfiguration, cache: Optional[PlanCache] = None):
         self.max_march_size = max_march_size
         self.buffs = buffs
-        self.effective_march_size = self.buffs.calculate_total_buff(max_march_size)
-
-    def generate_marches(self, num_marches, troops: TroopCount, ratios: list[dict[str, float]]):
-        total = troops.to_dict()
+        self.effective_march_size = get_buff_index(max_march_size).lookup(buffs)
+        self.cache = cache
+        self._uniform_sizes: Dict[int, np.ndarray] = {}
+
+    def _cached(self, method: str, num_marches, troops: TroopCount, ratios, sizes: np.ndarray, compute):
+        if self.cache is None:
+            return compute()
+        key = plan_key(method, tuple(sizes.tolist()), troops, ratios, num_marches)
+        return self.cache.get_or_compute(key, compute)
+
+    def march_sizes(self, num_marches, march_sizes: Optional[Sequence[int]] = None,
+                    march_buffs: Optional[Sequence[BuffConfiguration]] = None) -> np.ndarray:
+        """Return the effective size of each march as an int64 array.
+
+        march_sizes gives each march's base capacity and march_buffs its buffs;
+        either defaults to the manager's own for every march.
+        """
+        if march_sizes is None and march_buffs is None:
+            sizes = self._uniform_sizes.get(num_marches)
+            if sizes is None:
+                sizes = np.full(num_marches, self.effective_march_size, dtype=np.int64)
+                sizes.flags.writeable = False
+                self._uniform_sizes[num_marches] = sizes
+            return sizes
+        if any(values is not None and len(values) < num_marches for values in (march_sizes, march_buffs)):
+            raise ValueError("Provide a march size and buffs for every march.")
+
+        base = self.max_march_size if march_sizes is None else list(march_sizes[:num_marches])
+        buffs = [self.buffs] * num_marches if march_buffs is None else march_buffs[:num_marches]
+        sizes = effective_march_sizes(base, [b.pet_buff for b in buffs], [b.city_buff for b in buffs],
+                                      [b.minister_buff for b in buffs])
+        return np.broadcast_to(sizes, (num_marches,)).copy()
+
+    @timed()
+    def generate_marches(self, num_marches, troops: TroopCount, ratios: list[dict[str, float]],
+                         march_sizes: Optional[Sequence[int]] = None,
+                         march_buffs: Optional[Sequence[BuffConfiguration]] = None):
+        sizes = self.march_sizes(num_marches, march_sizes, march_buffs)
+        return self._cached('generate_marches', num_marches, troops, ratios, sizes,
+                            lambda: self._plan_marches(num_marches, troops, ratios, sizes))
+
+    def _plan_marches(self, num_marches, troops: TroopCount, ratios: list[dict[str, float]], sizes: np.ndarray):
+        total = [troops.infantry, troops.lancer, troops.marksman]
+        weights_by_ratio = {}
         marches = []
 
-        for i in range(num_marches):
+        for i, size in enumerate(sizes.tolist()[:num_marches]):
             r = ratios[i]
-            if round(r['infantry'] + r['lancer'] + r['marksman'], 2) != 100.0:
-                raise ValueError(f"March {i + 1} ratios must total 100%.")
-
-            march = {'infantry': 0, 'lancer': 0, 'marksman': 0}
-
-            # 1st pass: assign based on ceiling of ratio
-            requested = {
-                troop_type: math.ceil((r[troop_type] / 100) * self.effective_march_size)
-                for troop_type in TROOP_TYPES
-            }
-
-            # Initial assignment with availability check
-            for troop_type in TROOP_TYPES:
-                march[troop_type] = min(requested[troop_type], total[troop_type])
-                total[troop_type] -= march[troop_type]
-
-            march_total = sum(march.values())
-
-            # If we overfilled, trim lowest-priority troop types first
-            if march_total > self.effective_march_size:
-                overflow = march_total - self.effective_march_size
-                # Priority: lowest ratio → highest ratio
-                priority = sorted(TROOP_TYPES, key=lambda t: r[t])
-                for troop_type in priority:
-                    if overflow == 0:
-                        break
-                    reducible = min(march[troop_type], overflow)
-                    march[troop_type] -= reducible
-                    overflow -= reducible
-                    march_total -= reducible
-
-            # If we underfilled (rounding loss or exhausted types), backfill by priority
-            elif march_total < self.effective_march_size:
-                shortfall = self.effective_march_size - march_total
-                # Priority: highest ratio → lowest
-                priority = sorted(TROOP_TYPES, key=lambda t: -r[t])
-                for troop_type in priority:
-                    if shortfall == 0:
-                        break
-                    extra = min(shortfall, total[troop_type])
-                    march[troop_type] += extra
-                    total[troop_type] -= extra
-                    shortfall -= extra
-                    march_total += extra
-
-            march['total'] = march_total
+            key = (r['infantry'], r['lancer'], r['marksman'])
+            weights = weights_by_ratio.get(key)
+            if weights is None:
+                if round(sum(key), 2) != 100.0:
+                    raise ValueError(f"March {i + 1} ratios must total 100%.")
+                weights = weights_by_ratio[key] = to_basis_points(r)
+
+            # Split the march in basis points, capped by the troops still available
+            counts = largest_remainder(size, weights, total)
+            total = [available - used for available, used in zip(total, counts)]
+
+            march = dict(zip(TROOP_TYPES, counts))
+            march['total'] = sum(counts)
             marches.append(march)
 
         return marches
 
+    @timed()
+    def incremental_planner(self, num_marches, troops: TroopCount, ratios: list[dict[str, float]],
+                            march_sizes: Optional[Sequence[int]] = None,
+                            march_buffs: Optional[Sequence[BuffConfiguration]] = None) -> IncrementalPlanner:
+        """Plan marches once and keep the plan for cheap updates after troop or ratio changes."""
+        return IncrementalPlanner(self.march_sizes(num_marches, march_sizes, march_buffs),
+                                  troops, ratios[:num_marches])
+
+    @timed()
+    def generate_tiered_marches(self, num_marches, inventory: TroopInventory, ratios: list[dict[str, float]],
+                                march_sizes: Optional[Sequence[int]] = None,
+                                march_buffs: Optional[Sequence[BuffConfiguration]] = None
+                                ) -> Tuple[List[Dict[str, int]], np.ndarray]:
+        """Generate marches and fill each from the highest tier down.
+
+        Returns the marches and a (marches, types, tiers) array of troops per tier.
+        """
+        marches = self.generate_marches(num_marches, inventory.to_troop_count(), ratios, march_sizes, march_buffs)
+        march_counts = np.array([[march[troop_type] for troop_type in TROOP_TYPES] for march in marches],
+                                dtype=np.int64).reshape(len(marches), len(TROOP_TYPES))
+        return marches, fill_highest_tier_first(march_counts, inventory.counts)
+
+    @timed()
     def _generate_single_march(self, march_size: int, available_troops: Dict[str, int], ratio: Dict[str, float]) -> Dict[str, int]:
         if round(sum(ratio.values()), 2) != MAX_PERCENTAGE:
             raise ValueError("March ratios must total 100%.")
 
-        march = {troop_type: 0 for troop_type in TROOP_TYPES}
-        march['total'] = 0
-
-        for troop_type in TROOP_TYPES:
-            troops_count = int((ratio[troop_type] / 100) * march_size)
-            march[troop_type] = min(troops_count, available_troops[troop_type])
-            march['total'] += march[troop_type]
+        counts = largest_remainder(march_size, to_basis_points(ratio),
+                                   [available_troops[troop_type] for troop_type in TROOP_TYPES])
 
+        march = dict(zip(TROOP_TYPES, counts))
+        march['total'] = sum(counts)
         return march
 
-    def optimize_ratio(self, num_marches, troops: TroopCount, ratio_type: str) -> dict[str, float]:
-        total_needed = num_marches * self.effective_march_size
-        available = troops.to_dict()
-
-        base_ratios = {
-            "Bear": {"infantry": 10, "lancer": 30, "marksman": 60},
-            "Infantry Focused": {"infantry": 60, "lancer": 30, "marksman": 10},
-            "Balanced": {"infantry": 33, "lancer": 33, "marksman": 34},
-            "Lancer Charge": {"infantry": 5, "lancer": 85, "marksman": 10},
-            "Marksman Rush": {"infantry": 5, "lancer": 15, "marksman": 80},
-            "Infantry Wall": {"infantry": 80, "lancer": 10, "marksman": 10},
-            "Standard Formation": {"infantry": 45, "lancer": 10, "marksman": 45},
-            "Garrison": {"infantry": 50, "lancer": 40, "marksman": 10},
-            "Rally": {"infantry": 30, "lancer": 20, "marksman": 50}
-        }.get(ratio_type, {"infantry": 33.33, "lancer": 33.33, "marksman": 33.34})
-
-        # Calculate ideal troop count using ceil to avoid rounding down
-        ideal = {
-            t: math.ceil(base_ratios[t] / 100 * total_needed)
-            for t in TROOP_TYPES
-        }
-
-        assigned = {t: 0 for t in TROOP_TYPES}
-        remaining = total_needed
-
-        # Distribute based on preferred priority
-        priority = sorted(base_ratios.keys(), key=lambda t: -base_ratios[t])
-
-        for t in priority:
-            give = min(ideal[t], available[t], remaining)
-            assigned[t] = give
-            available[t] -= give
-            remaining -= give
-            if remaining == 0:
-                break
-
-        # Redistribute shortfall based on priority again
-        if remaining > 0:
-            for t in priority:
-                if available[t] > 0:
-                    extra = min(available[t], remaining)
-                    assigned[t] += extra
-                    available[t] -= extra
-                    remaining -= extra
-                if remaining == 0:
-                    break
-
-        total_assigned = sum(assigned.values())
-        if total_assigned == 0:
+    @timed()
+    def optimize_ratio(self, num_marches, troops: TroopCount, ratio_type: str,
+                       march_sizes: Optional[Sequence[int]] = None,
+                       march_buffs: Optional[Sequence[BuffConfiguration]] = None) -> dict[str, float]:
+        sizes = self.march_sizes(num_marches, march_sizes, march_buffs)
+        # Key on the resolved ratio so an edited formation is not served from the cache
+        basis_points = get_registry().basis_points_of(ratio_type, DEFAULT_FORMATION_BASIS_POINTS)
+        return self._cached('optimize_ratio', num_marches, troops, basis_points, sizes,
+                            lambda: self._optimize_ratio(int(sizes.sum()), troops, basis_points))
+
+    def _optimize_ratio(self, total_needed: int, troops: TroopCount, basis_points: Tuple[int, ...]) -> dict[str, float]:
+        # Split the troops needed across types, capped by what is available
+        assigned = largest_remainder(total_needed, basis_points, [troops.infantry, troops.lancer, troops.marksman])
+
+        if sum(assigned) == 0:
             return {t: 0 for t in TROOP_TYPES}
 
-        # Step 1: Calculate raw integer percentages
-        raw_percentages = {
-            t: int((assigned[t] / total_assigned) * 100)
-            for t in TROOP_TYPES
-        }
-
-        # Step 2: Distribute remainder to closest troop type
-        current_sum = sum(raw_percentages.values())
-        remainder = 100 - current_sum
-
-        # Find troop type with largest remainder part and add the leftover(s) to it
-        if remainder > 0:
-            # Calculate decimal remainders to determine where to add the extra
-            remainders = {
-                t: ((assigned[t] / total_assigned) * 100) - raw_percentages[t]
-                for t in TROOP_TYPES
-            }
-            # Sort by largest remainder
-            sorted_remainders = sorted(remainders.items(), key=lambda x: -x[1])
-            for i in range(remainder):
-                raw_percentages[sorted_remainders[i % len(TROOP_TYPES)][0]] += 1
-
-        return raw_percentages
\ No newline at end of file
+        # Express the assignment as whole percentages
+        return dict(zip(TROOP_TYPES, largest_remainder(MAX_PERCENTAGE, assigned)))
+
+    @timed()
+    def solve_ratio(self, num_marches, troops: TroopCount, ratio_type: str,
+                    march_sizes: Optional[Sequence[int]] = None,
+                    march_buffs: Optional[Sequence[BuffConfiguration]] = None) -> RatioSolution:
+        """Return the ratio closest to the formation that still fills every march."""
+        sizes = self.march_sizes(num_marches, march_sizes, march_buffs)
+        target = self._base_ratios(ratio_type)
+        return self._cached('solve_ratio', num_marches, troops, [target], sizes,
+                            lambda: solve_ratio(target, troops.to_dict(), int(sizes.sum())))
+
+    @timed()
+    def sweep_formations(self, troops: TroopCount, march_counts=range(1, 8)) -> List[SweepResult]:
+        """Rank every formation preset against every march count in one pass."""
+        return sweep_formations(troops, self.effective_march_size, get_registry(), march_counts)
+
+    @timed()
+    def feasibility_region(self, num_marches, troops: TroopCount,
+                           march_sizes: Optional[Sequence[int]] = None,
+                           march_buffs: Optional[Sequence[BuffConfiguration]] = None) -> FeasibilityRegion:
+        """Return the whole-percent ratios every march can keep as set with these troops."""
+        return get_feasibility_region(troops, tuple(self.march_sizes(num_marches, march_sizes, march_buffs).tolist()))
+
+    @timed()
+    def plan_rally(self, rally_capacity: int, joiners: List[RallyJoiner], ratio_type: str) -> RallyPlan:
+        """Split a rally of rally_capacity across joiners to match the formation."""
+        return plan_rally(rally_capacity, self._base_ratios(ratio_type), joiners)
+
+    def simulate_waves(self, num_marches, troops: TroopCount, ratios: list[dict[str, float]], num_waves: int,
+                       num_scenarios: int, loss: LossModel, heal: HealModel, ratio_type: Optional[str] = None,
+                       march_sizes: Optional[Sequence[int]] = None,
+                       march_buffs: Optional[Sequence[BuffConfiguration]] = None,
+                       seed: Optional[int] = None) -> Iterator[WaveSummary]:
+        """Stream per-wave Monte Carlo summaries of replanning these marches after losses and heals.
+
+        With ratio_type, the ratio is re-optimized towards that formation before every wave.
+        """
+        formation = self._base_ratios(ratio_type) if ratio_type is not None else None
+        return simulate_waves(troops, ratios[:num_marches], self.march_sizes(num_marches, march_sizes, march_buffs),
+                              num_waves, num_scenarios, loss, heal, formation=formation, seed=seed)
+
+    @staticmethod
+    def _base_ratios(ratio_type: str) -> Dict[str, float]:
+        return get_registry().get(ratio_type, DEFAULT_FORMATION_RATIO)
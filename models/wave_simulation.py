@@ -0,0 +1,179 @@
+# models/wave_simulation.py
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.batch_planner import generate_marches_batch, optimize_ratio_batch
+from models.troop_count import TroopCount
+
+DEFAULT_SIMULATION_CHUNK = 4096
+
+
+@dataclass
+class LossModel:
+    """Share of each deployed type lost per wave.
+
+    Each scenario draws a loss rate per type from a normal distribution around
+    the mean (clipped to [0, 1]), then loses a binomial sample of the troops it
+    deployed at that rate.
+    """
+    mean: Dict[str, float] = field(default_factory=lambda: {t: 0.1 for t in TROOP_TYPES})
+    spread: float = 0.05
+
+    def sample(self, rng: np.random.Generator, deployed: np.ndarray) -> np.ndarray:
+        mean = np.array([self.mean[troop_type] for troop_type in TROOP_TYPES])
+        rates = np.clip(rng.normal(mean, self.spread, deployed.shape), 0.0, 1.0)
+        return rng.binomial(deployed, rates)
+
+
+@dataclass
+class HealModel:
+    """Share of each wave's losses healed before the next wave, up to a per-wave capacity."""
+    rate: float = 0.5
+    capacity: Optional[int] = None
+
+    def sample(self, rng: np.random.Generator, lost: np.ndarray) -> np.ndarray:
+        healed = rng.binomial(lost, self.rate)
+        if self.capacity is None:
+            return healed
+        # Scale every type down by the same factor when the infirmary is full
+        total = healed.sum(axis=1, keepdims=True)
+        scale = np.minimum(1.0, self.capacity / np.maximum(total, 1))
+        return np.floor(healed * scale).astype(np.int64)
+
+
+@dataclass
+class WaveSummary:
+    wave: int
+    scenarios: int
+    marches_sustained: float
+    marches_sustained_p10: int
+    marches_sustained_p50: int
+    marches_sustained_p90: int
+    full_plan_rate: float
+    ratio_drift: float
+    ratio_drift_max: float
+    remaining: Dict[str, float]
+    lost: Dict[str, float]
+    healed: Dict[str, float]
+
+    def to_row(self) -> Dict[str, object]:
+        row = {
+            'Wave': self.wave,
+            'Marches Sustained': round(self.marches_sustained, 2),
+            'P10': self.marches_sustained_p10,
+            'P50': self.marches_sustained_p50,
+            'P90': self.marches_sustained_p90,
+            'Full Plan %': round(self.full_plan_rate * 100, 2),
+            'Ratio Drift (pp)': round(self.ratio_drift, 2),
+        }
+        for troop_type in TROOP_TYPES:
+            row[f"{troop_type.capitalize()} Left"] = round(self.remaining[troop_type])
+        return row
+
+
+class _WaveStats:
+    """Running totals for one wave, merged chunk by chunk."""
+
+    def __init__(self, num_marches: int):
+        self.count = 0
+        self.sustained = np.zeros(num_marches + 1, dtype=np.int64)
+        self.drift_sum = 0.0
+        self.drift_count = 0
+        self.drift_max = 0.0
+        self.remaining = np.zeros(len(TROOP_TYPES))
+        self.lost = np.zeros(len(TROOP_TYPES))
+        self.healed = np.zeros(len(TROOP_TYPES))
+
+    def add(self, sustained: np.ndarray, drift: np.ndarray, remaining: np.ndarray,
+            lost: np.ndarray, healed: np.ndarray) -> None:
+        self.count += len(sustained)
+        self.sustained += np.bincount(sustained, minlength=len(self.sustained))
+        if drift.size:
+            self.drift_sum += float(drift.sum())
+            self.drift_count += drift.size
+            self.drift_max = max(self.drift_max, float(drift.max()))
+        self.remaining += remaining.sum(axis=0)
+        self.lost += lost.sum(axis=0)
+        self.healed += healed.sum(axis=0)
+
+    def summary(self, wave: int) -> WaveSummary:
+        num_marches = len(self.sustained) - 1
+        cumulative = np.cumsum(self.sustained) / max(self.count, 1)
+
+        def percentile(q: float) -> int:
+            return int(np.searchsorted(cumulative, q))
+
+        def per_type(totals: np.ndarray) -> Dict[str, float]:
+            return dict(zip(TROOP_TYPES, (totals / max(self.count, 1)).tolist()))
+
+        return WaveSummary(
+            wave=wave,
+            scenarios=self.count,
+            marches_sustained=float(np.dot(np.arange(num_marches + 1), self.sustained) / max(self.count, 1)),
+            marches_sustained_p10=percentile(0.1),
+            marches_sustained_p50=percentile(0.5),
+            marches_sustained_p90=percentile(0.9),
+            full_plan_rate=float(self.sustained[-1] / max(self.count, 1)),
+            ratio_drift=self.drift_sum / self.drift_count if self.drift_count else 0.0,
+            ratio_drift_max=self.drift_max,
+            remaining=per_type(self.remaining),
+            lost=per_type(self.lost),
+            healed=per_type(self.healed),
+        )
+
+
+def simulate_waves(troops: TroopCount, ratios: List[Dict[str, float]], march_sizes, num_waves: int,
+                   num_scenarios: int, loss: LossModel, heal: HealModel,
+                   formation: Optional[Dict[str, float]] = None, seed: Optional[int] = None,
+                   chunk_size: int = DEFAULT_SIMULATION_CHUNK) -> Iterator[WaveSummary]:
+    """Plan, fight and heal wave after wave for many scenarios, yielding one summary per wave.
+
+    ratios gives one ratio per march and march_sizes one effective size per march
+    (or a scalar). With a formation, the ratio is re-optimized towards it from the
+    troops left before every wave, as TroopManager.optimize_ratio would. Every
+    scenario starts from the same troops; only the current troops of each are
+    kept, and scenarios are planned chunk_size at a time with the batch planner.
+    """
+    num_marches = len(ratios)
+    sizes = np.broadcast_to(np.asarray(march_sizes, dtype=np.int64), (num_marches,))
+    rng = np.random.default_rng(seed)
+
+    start = np.array([troops.to_dict()[troop_type] for troop_type in TROOP_TYPES], dtype=np.int64)
+    state = np.tile(start, (num_scenarios, 1))
+    march_ratios = np.array([[r[troop_type] for troop_type in TROOP_TYPES] for r in ratios], dtype=np.float64)
+    if formation is not None:
+        target = np.array([formation[troop_type] for troop_type in TROOP_TYPES], dtype=np.float64)
+    else:
+        target = sizes @ march_ratios / max(int(sizes.sum()), 1)
+
+    for wave in range(1, num_waves + 1):
+        stats = _WaveStats(num_marches)
+        for begin in range(0, num_scenarios, chunk_size):
+            current = state[begin:begin + chunk_size]
+
+            if formation is None:
+                chunk_ratios = march_ratios
+            else:
+                optimized = optimize_ratio_batch(current, target, int(sizes.sum())).astype(np.float64)
+                # Scenarios with no troops left keep the formation so the plan stays valid
+                optimized[optimized.sum(axis=1) == 0] = target
+                chunk_ratios = np.repeat(optimized[:, None, :], num_marches, axis=1)
+
+            marches = generate_marches_batch(current, chunk_ratios, sizes[None, :])
+            deployed = marches.sum(axis=1)
+            sustained = (marches.sum(axis=2) == sizes).sum(axis=1)
+
+            sent = deployed.sum(axis=1)
+            fought = sent > 0
+            drift = np.abs(deployed[fought] * 100 / sent[fought, None] - target).sum(axis=1) / 2
+
+            lost = loss.sample(rng, deployed)
+            healed = heal.sample(rng, lost)
+            current += healed - lost
+
+            stats.add(sustained, drift, current, lost, healed)
+
+        yield stats.summary(wave)
@@ -0,0 +1,293 @@
+# service.py
+"""Local HTTP/JSON planning service with request micro-batching.
+
+    python service.py --port 8765 --max-batch 512 --max-wait-ms 2
+
+Concurrent requests are collected into micro-batches and planned together
+with the vectorized batch planner, off the event loop.
+
+    POST /generate_marches  {"base_march_size", "pet_buff", "city_buff", "minister_buff",
+                             "troops": {...}, "num_marches", "ratios": [{...}, ...] or "ratio": {...}}
+    POST /optimize_ratio    {"base_march_size", "pet_buff", "city_buff", "minister_buff",
+                             "troops": {...}, "num_marches", "formation"}
+
+Either request may give "march_sizes": [...], one base size per march, in
+place of "base_march_size". "formation" must name a known formation; without
+it the default ratio is used.
+    GET  /stats             p50/p99 latency, throughput and batch sizes
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from constants import TROOP_TYPES, DEFAULT_FORMATION_RATIO, MAX_MARCHES, MAX_COUNT
+from models.batch_planner import generate_marches_batch, optimize_ratio_batch
+from models.buff_index import effective_march_sizes
+from models.buffs import BuffConfiguration
+from models.formation_registry import get_registry
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+LATENCY_WINDOW = 100_000
+
+
+@dataclass
+class PlanRequest:
+    kind: str
+    march_sizes: List[int]
+    troops: List[int]
+    num_marches: int
+    ratios: List[List[float]]
+
+
+def parse_plan_request(kind: str, payload: Dict[str, Any]) -> PlanRequest:
+    """Validate a request body; raises ValueError with a client-facing message."""
+    try:
+        buffs = BuffConfiguration(int(payload.get('pet_buff', 0)), int(payload.get('city_buff', 0)),
+                                  int(payload.get('minister_buff', 0)))
+        troops = [int(payload['troops'].get(troop_type, 0)) for troop_type in TROOP_TYPES]
+        num_marches = int(payload.get('num_marches', 1))
+        base_sizes = ([int(size) for size in payload['march_sizes']] if 'march_sizes' in payload
+                      else [int(payload['base_march_size'])] * min(max(num_marches, 0), MAX_MARCHES))
+    except (KeyError, TypeError, AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid request: {e}") from e
+
+    if not 1 <= num_marches <= MAX_MARCHES:
+        raise ValueError(f"num_marches must be between 1 and {MAX_MARCHES}.")
+    if min(troops) < 0 or max(troops) > MAX_COUNT:
+        raise ValueError(f"Troop counts must be between 0 and {MAX_COUNT}.")
+    if len(base_sizes) < num_marches or min(base_sizes[:num_marches]) < 1 or max(base_sizes[:num_marches]) > MAX_COUNT:
+        raise ValueError(f"Provide a base size between 1 and {MAX_COUNT} for every march.")
+    if not all(0 <= value <= MAX_COUNT for value in (buffs.pet_buff, buffs.minister_buff)) \
+            or not 0 <= buffs.city_buff <= 100:
+        raise ValueError("Buffs must be non-negative and the city buff at most 100%.")
+    march_sizes = effective_march_sizes(base_sizes[:num_marches], buffs.pet_buff, buffs.city_buff,
+                                        buffs.minister_buff).tolist()
+
+    if kind == 'optimize_ratio':
+        name = payload.get('formation')
+        formation = DEFAULT_FORMATION_RATIO if name is None else get_registry().get(str(name))
+        if formation is None:
+            raise ValueError(f"Unknown formation {name!r}.")
+        ratios = [[formation[troop_type] for troop_type in TROOP_TYPES]]
+    else:
+        given = payload.get('ratios') or [payload.get('ratio')] * num_marches
+        if len(given) < num_marches or not all(isinstance(r, dict) for r in given):
+            raise ValueError("Provide 'ratio' or one entry in 'ratios' per march.")
+        try:
+            ratios = [[float(r.get(troop_type, 0)) for troop_type in TROOP_TYPES] for r in given[:num_marches]]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid request: {e}") from e
+        for i, ratio in enumerate(ratios):
+            if not all(0 <= value <= 100 for value in ratio) or round(sum(ratio), 2) != 100.0:
+                raise ValueError(f"March {i + 1} ratios must be between 0 and 100% and total 100%.")
+
+    return PlanRequest(kind, march_sizes, troops, num_marches, ratios)
+
+
+def plan_batch(requests: List[PlanRequest]) -> List[Union[Dict[str, Any], Exception]]:
+    """Plan a micro-batch, grouping requests that share a shape into one vectorized call.
+
+    A group that fails returns its exception for each of its requests, so the
+    rest of the batch is still answered.
+    """
+    results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(requests)
+    groups: Dict[Tuple[str, int], List[int]] = {}
+    for i, request in enumerate(requests):
+        groups.setdefault((request.kind, request.num_marches), []).append(i)
+
+    for (kind, num_marches), indices in groups.items():
+        try:
+            _plan_group(requests, kind, indices, results)
+        except Exception as e:
+            for i in indices:
+                results[i] = e
+
+    return results
+
+
+def _plan_group(requests: List[PlanRequest], kind: str, indices: List[int],
+                results: List[Union[Dict[str, Any], Exception, None]]) -> None:
+    troops = np.array([requests[i].troops for i in indices], dtype=np.int64)
+    sizes = np.array([requests[i].march_sizes for i in indices], dtype=np.int64)
+
+    if kind == 'optimize_ratio':
+        ratios = np.array([requests[i].ratios[0] for i in indices], dtype=np.float64)
+        planned = optimize_ratio_batch(troops, ratios, sizes)
+        for i, percentages in zip(indices, planned.tolist()):
+            results[i] = {'ratio': dict(zip(TROOP_TYPES, percentages))}
+    else:
+        ratios = np.array([requests[i].ratios for i in indices], dtype=np.float64)
+        planned = generate_marches_batch(troops, ratios, sizes)
+        for i, marches in zip(indices, planned.tolist()):
+            results[i] = {'marches': [dict(zip(TROOP_TYPES, march), total=sum(march)) for march in marches]}
+
+
+class ServiceStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.completed = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    def record_batch(self, size: int) -> None:
+        self.batches += 1
+        self.batched_requests += size
+
+    def record_latency(self, seconds: float) -> None:
+        self.completed += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'completed': self.completed,
+            'throughput_rps': round(self.completed / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+            'batches': self.batches,
+            'mean_batch_size': round(self.batched_requests / self.batches, 1) if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Collects queued requests for up to max_wait seconds or max_batch items, then plans them together."""
+
+    def __init__(self, stats: ServiceStats, max_batch: int = 512, max_wait: float = 0.002):
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def submit(self, request: PlanRequest) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((request, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_wait:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self.stats.record_batch(len(batch))
+            try:
+                results = await loop.run_in_executor(None, plan_batch, [request for request, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class PlanningService:
+    def __init__(self, max_batch: int = 512, max_wait: float = 0.002):
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(self.stats, max_batch, max_wait)
+        self._batcher_task: Optional[asyncio.Task] = None
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if path == '/stats':
+            return 200, self.stats.snapshot()
+
+        kind = path.strip('/')
+        if kind not in ('generate_marches', 'optimize_ratio'):
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST."}
+
+        start = time.perf_counter()
+        try:
+            request = parse_plan_request(kind, json.loads(body or b'{}'))
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        result = await self.batcher.submit(request)
+        self.stats.record_latency(time.perf_counter() - start)
+        return 200, result
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {'error': f"Planning failed: {e}"}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload, separators=(',', ':')).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self._batcher_task = asyncio.get_running_loop().create_task(self.batcher.run())
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=4096)
+
+
+async def serve(host: str, port: int, max_batch: int, max_wait: float) -> None:
+    service = PlanningService(max_batch, max_wait)
+    server = await service.start(host, port)
+    print(f"Planning service listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve TroopManager planning over local HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=512, help="Most requests planned together.")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help="How long to collect a batch.")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import numpy as np
+
+from models.allocation import largest_remainder, largest_remainder_array
+
+
+def test_cap_that_does_not_bind_leaves_the_split_unchanged():
+    # Lancers get no share at 91/1/8, so having none in stock changes nothing
+    weights = [9100, 100, 800]
+    assert largest_remainder(6, weights) == [5, 0, 1]
+    assert largest_remainder(6, weights, [10, 10, 4]) == [5, 0, 1]
+    assert largest_remainder(6, weights, [10, 0, 4]) == [5, 0, 1]
+    assert largest_remainder_array(6, [weights], [[10, 0, 4]]).tolist() == [[5, 0, 1]]
+
+
+def test_random_splits_respect_caps_and_hand_out_the_total():
+    rng = np.random.default_rng(2)
+    for _ in range(300):
+        size = int(rng.integers(1, 5))
+        num_rows = int(rng.integers(1, 20))
+        totals = rng.integers(0, 5000, num_rows)
+        # Include zero weights and zero caps, which take the re-split and fill-in paths
+        weights = rng.integers(0, 3, (num_rows, size)) * rng.integers(0, 10000, (num_rows, size))
+        caps = rng.integers(0, 3000, (num_rows, size)) * (rng.random((num_rows, size)) > 0.2)
+
+        capped = largest_remainder_array(totals, weights, caps)
+        uncapped = largest_remainder_array(totals, weights)
+        for row in range(num_rows):
+            total, row_weights, row_caps = int(totals[row]), weights[row].tolist(), caps[row].tolist()
+            split = largest_remainder(total, row_weights, row_caps)
+            assert capped[row].tolist() == split
+            assert all(0 <= share <= cap for share, cap in zip(split, row_caps))
+            assert sum(split) == min(total, sum(row_caps))
+
+            free_split = largest_remainder(total, row_weights)
+            assert uncapped[row].tolist() == free_split
+            assert sum(free_split) == total
@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.batch_planner import generate_marches_batch, optimize_ratio_batch
+from models.buffs import BuffConfiguration
+from models.formation_registry import get_registry
+from models.troop_count import TroopCount
+from models.troop_manager import TroopManager
+
+FORMATIONS = [(10, 30, 60), (33, 33, 34), (5, 85, 10), (33.33, 33.33, 33.34), (100, 0, 0)]
+
+
+def random_troops(rng: random.Random, scale: int) -> TroopCount:
+    return TroopCount(*(rng.randint(0, scale) for _ in TROOP_TYPES))
+
+
+def test_generate_marches_batch_matches_scalar_planner():
+    rng = random.Random(1)
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    for num_marches in range(1, 6):
+        troops = [random_troops(rng, 4000) for _ in range(40)]
+        ratios = [[dict(zip(TROOP_TYPES, rng.choice(FORMATIONS))) for _ in range(num_marches)] for _ in troops]
+        sizes = [[rng.randint(1, 1500) for _ in range(num_marches)] for _ in troops]
+
+        planned = generate_marches_batch(
+            np.array([[getattr(t, troop_type) for troop_type in TROOP_TYPES] for t in troops]),
+            np.array([[[r[troop_type] for troop_type in TROOP_TYPES] for r in row] for row in ratios]),
+            np.array(sizes))
+
+        for player, (t, r, s) in enumerate(zip(troops, ratios, sizes)):
+            expected = manager.generate_marches(num_marches, t, r, march_sizes=s)
+            assert planned[player].tolist() == [[march[troop_type] for troop_type in TROOP_TYPES]
+                                                for march in expected]
+
+
+def test_optimize_ratio_batch_matches_scalar_planner():
+    rng = random.Random(2)
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    for formation in ('Bear', 'Balanced', 'Lancer Charge'):
+        ratio = get_registry().get(formation)
+        troops = [random_troops(rng, 5000) for _ in range(60)] + [TroopCount(0, 0, 0)]
+        num_marches = rng.randint(1, 7)
+
+        planned = optimize_ratio_batch(
+            np.array([[getattr(t, troop_type) for troop_type in TROOP_TYPES] for t in troops]),
+            np.array([ratio[troop_type] for troop_type in TROOP_TYPES]),
+            num_marches * manager.effective_march_size)
+
+        for t, percentages in zip(troops, planned.tolist()):
+            expected = manager.optimize_ratio(num_marches, t, formation)
+            assert percentages == [expected[troop_type] for troop_type in TROOP_TYPES]
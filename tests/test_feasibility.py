@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+
+from constants import TROOP_TYPES, MAX_PERCENTAGE
+from models.allocation import largest_remainder_array, BASIS_POINTS
+from models.batch_planner import generate_marches_batch
+from models.feasibility import GRID_SIDE, get_feasibility_region, march_shortfalls
+from models.buffs import BuffConfiguration
+from models.troop_count import TroopCount
+from models.troop_manager import TroopManager
+
+
+def test_region_matches_planner_over_the_whole_grid():
+    """A cell is feasible exactly when every march gets its full uncapped split."""
+    rng = random.Random(5)
+    infantry, lancer = np.divmod(np.arange(GRID_SIDE * GRID_SIDE), GRID_SIDE)
+    valid = infantry + lancer <= MAX_PERCENTAGE
+    percentages = np.stack([infantry, lancer, MAX_PERCENTAGE - infantry - lancer], axis=1)[valid]
+
+    for _ in range(6):
+        sizes = tuple(rng.randint(50, 400) for _ in range(rng.randint(1, 4)))
+        troops = TroopCount(*(rng.randint(0, 600) for _ in TROOP_TYPES))
+        region = get_feasibility_region(troops, sizes)
+
+        marches = generate_marches_batch(np.tile([troops.infantry, troops.lancer, troops.marksman],
+                                                 (len(percentages), 1)),
+                                         percentages[:, None, :].repeat(len(sizes), axis=1), np.array(sizes)[None, :])
+        weights = percentages * (BASIS_POINTS // MAX_PERCENTAGE)
+        uncapped = np.stack([largest_remainder_array(size, weights) for size in sizes], axis=1)
+        expected = (marches == uncapped).all(axis=(1, 2))
+
+        for ratio, feasible in zip(percentages.tolist(), expected.tolist()):
+            ratio = dict(zip(TROOP_TYPES, ratio))
+            assert region.is_feasible(ratio) == feasible
+            assert (sum(region.shortfall(ratio).values()) == 0) == feasible
+        assert region.count == int(expected.sum())
+
+
+def test_off_grid_ratios_are_infeasible():
+    region = get_feasibility_region(TroopCount(1000, 1000, 1000), (100,))
+    assert not region.is_feasible({'infantry': 33.5, 'lancer': 33.5, 'marksman': 33})
+    assert not region.is_feasible({'infantry': 50, 'lancer': 50, 'marksman': 50})
+    assert region.is_feasible({'infantry': 33, 'lancer': 33, 'marksman': 34})
+
+
+def test_ratio_that_uses_none_of_an_empty_type_stays_feasible():
+    ratio = {'infantry': 91, 'lancer': 1, 'marksman': 8}
+    region = get_feasibility_region(TroopCount(10, 0, 4), (6,))
+    manager = TroopManager(6, BuffConfiguration(0, 0, 0))
+
+    assert region.is_feasible(ratio)
+    assert manager.generate_marches(1, TroopCount(10, 0, 4), [ratio])[0] == {
+        'infantry': 5, 'lancer': 0, 'marksman': 1, 'total': 6}
+
+
+def test_march_shortfalls_follow_the_planner_march_by_march():
+    rng = random.Random(6)
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    formations = [(10, 30, 60), (50, 20, 30), (91, 1, 8), (0, 0, 100), (33, 33, 34)]
+    for _ in range(200):
+        num_marches = rng.randint(1, 5)
+        sizes = [rng.randint(1, 300) for _ in range(num_marches)]
+        troops = TroopCount(*(rng.randint(0, 600) for _ in TROOP_TYPES))
+        ratios = [dict(zip(TROOP_TYPES, rng.choice(formations))) for _ in range(num_marches)]
+
+        shortfalls = march_shortfalls(troops, sizes, ratios)
+        marches = manager.generate_marches(num_marches, troops, ratios, march_sizes=sizes)
+        for size, ratio, shortfall, march in zip(sizes, ratios, shortfalls, marches):
+            uncapped = manager.generate_marches(1, TroopCount(size, size, size), [ratio], march_sizes=[size])[0]
+            assert (sum(shortfall.values()) == 0) == (march == uncapped)
+
+
+def test_march_shortfalls_skip_marches_without_a_ratio():
+    ratio = {'infantry': 50, 'lancer': 50, 'marksman': 0}
+    shortfalls = march_shortfalls(TroopCount(100, 100, 0), [100, 100, 100], [ratio, None, ratio])
+    assert shortfalls == [{'infantry': 0, 'lancer': 0, 'marksman': 0}, None,
+                          {'infantry': 0, 'lancer': 0, 'marksman': 0}]
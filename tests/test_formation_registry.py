@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+import time
+
+from models.formation_registry import FormationRegistry
+
+BEAR = {'infantry': 10, 'lancer': 30, 'marksman': 60}
+
+
+def touch_later(path, seconds):
+    os.utime(path, (time.time() + seconds,) * 2)
+
+
+def test_invalid_edit_keeps_the_last_good_table(tmp_path):
+    presets, user = tmp_path / 'formations.json', tmp_path / 'user.json'
+    presets.write_text(json.dumps({'Bear': BEAR}))
+    user.write_text(json.dumps({'Mine': {'infantry': 50, 'lancer': 25, 'marksman': 25}}))
+    registry = FormationRegistry(presets, user)
+
+    user.write_text('{"Mine": {"infantry": 50, "lancer"')
+    touch_later(user, 5)
+    assert not registry.reload_if_changed()
+    assert registry.names == ['Bear', 'Mine'] and registry.load_error
+
+    user.write_text(json.dumps({'Mine': {'infantry': 50, 'lancer': 25, 'marksman': 20}}))
+    touch_later(user, 10)
+    assert not registry.reload_if_changed()
+    assert registry.get('Mine') == {'infantry': 50, 'lancer': 25, 'marksman': 25}
+
+    user.write_text(json.dumps({'Mine': {'infantry': 40, 'lancer': 30, 'marksman': 30}}))
+    touch_later(user, 15)
+    assert registry.reload_if_changed()
+    assert registry.basis_points_of('Mine') == (4000, 3000, 3000) and registry.load_error is None
+
+
+def test_broken_user_file_at_start_falls_back_to_presets(tmp_path):
+    presets, user = tmp_path / 'formations.json', tmp_path / 'user.json'
+    presets.write_text(json.dumps({'Bear': BEAR}))
+    user.write_text('not json')
+    registry = FormationRegistry(presets, user)
+    assert registry.names == ['Bear'] and registry.load_error
+
+
+def test_concurrent_saves_keep_every_formation(tmp_path):
+    presets, user = tmp_path / 'formations.json', tmp_path / 'user.json'
+    presets.write_text(json.dumps({'Bear': BEAR}))
+    registry = FormationRegistry(presets, user)
+    threads = [threading.Thread(target=registry.save_user_formation, args=(f"Formation {i}", BEAR))
+               for i in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(json.loads(user.read_text())) == 30
+    assert len(registry) == 31
+    assert sorted(os.listdir(tmp_path)) == ['formations.json', 'user.json']
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from constants import TROOP_TYPES
+from models.buffs import BuffConfiguration
+from models.troop_count import TroopCount
+from models.troop_manager import TroopManager
+
+FORMATIONS = [(10, 30, 60), (33, 33, 34), (5, 85, 10), (60, 30, 10), (0, 50, 50), (91, 1, 8), (99, 0, 1)]
+
+
+def random_ratio(rng: random.Random):
+    return dict(zip(TROOP_TYPES, rng.choice(FORMATIONS)))
+
+
+@pytest.mark.parametrize('max_size, max_troops, max_delta', [(1200, 5000, 1500), (12, 20, 10)])
+def test_incremental_updates_match_full_replan(max_size, max_troops, max_delta):
+    rng = random.Random(3)
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    for _ in range(40):
+        num_marches = rng.randint(1, 7)
+        sizes = [rng.randint(1, max_size) for _ in range(num_marches)]
+        # Small sizes and empty stocks reach shares that round to zero
+        troops = TroopCount(*(rng.choice([0, rng.randint(0, max_troops)]) for _ in TROOP_TYPES))
+        ratios = [random_ratio(rng) for _ in range(num_marches)]
+        planner = manager.incremental_planner(num_marches, troops, ratios, march_sizes=sizes)
+
+        for _ in range(15):
+            if rng.random() < 0.5:
+                index = rng.randrange(num_marches)
+                ratios[index] = random_ratio(rng)
+                planner.set_ratio(index, ratios[index])
+            else:
+                delta = [max(rng.randint(-max_delta, max_delta), -count)
+                         for count in (troops.infantry, troops.lancer, troops.marksman)]
+                troops = TroopCount(*(count + change for count, change in
+                                      zip((troops.infantry, troops.lancer, troops.marksman), delta)))
+                planner.apply_delta(TroopCount(*delta))
+
+            assert planner.marches == manager.generate_marches(num_marches, troops, ratios, march_sizes=sizes)
+
+
+def test_running_out_of_an_unused_type_keeps_the_plan():
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    ratio = dict(zip(TROOP_TYPES, (91, 1, 8)))
+    planner = manager.incremental_planner(1, TroopCount(10, 10, 4), [ratio], march_sizes=[6])
+
+    assert planner.apply_delta(TroopCount(0, -10, 0)) == []
+    assert planner.marches == manager.generate_marches(1, TroopCount(10, 0, 4), [ratio], march_sizes=[6])
+    assert planner.marches[0] == {'infantry': 5, 'lancer': 0, 'marksman': 1, 'total': 6}
+
+
+def test_negative_troops_are_rejected():
+    manager = TroopManager(1000, BuffConfiguration(0, 0, 0))
+    planner = manager.incremental_planner(1, TroopCount(10, 10, 10), [random_ratio(random.Random(4))])
+    with pytest.raises(ValueError):
+        planner.apply_delta(TroopCount(-11, 0, 0))
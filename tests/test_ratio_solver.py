@@ -0,0 +1,32 @@
+import numpy as np
+
+from constants import TROOP_TYPES
+from models.allocation import largest_remainder
+from models.ratio_solver import solve_ratio, solve_ratio_array
+
+# Whole-percent targets: 33.33-style targets can land on float ties that the two versions break differently
+TARGETS = [(10, 30, 60), (33, 33, 34), (5, 85, 10), (45, 10, 45), (100, 0, 0)]
+
+
+def test_random_rosters_get_full_ratios_within_their_caps():
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        num_rows = 40
+        target = TARGETS[int(rng.integers(len(TARGETS)))]
+        caps = rng.integers(0, 3000, (num_rows, len(TROOP_TYPES))) * (rng.random((num_rows, len(TROOP_TYPES))) > 0.2)
+        needed = rng.integers(0, 6000, num_rows)
+
+        ratios, gaps, feasible = solve_ratio_array(target, caps, needed)
+        for row in range(num_rows):
+            row_caps, total = caps[row].tolist(), int(needed[row])
+            solution = solve_ratio(dict(zip(TROOP_TYPES, target)), dict(zip(TROOP_TYPES, row_caps)), total)
+            assert ratios[row].tolist() == [solution.ratio[troop_type] for troop_type in TROOP_TYPES]
+            assert gaps[row] == solution.gap
+            assert feasible[row] == solution.feasible
+
+            basis_points = [int(round(solution.ratio[troop_type] * 100)) for troop_type in TROOP_TYPES]
+            if total > 0 and sum(row_caps) > 0:
+                assert sum(basis_points) == 10000
+            if solution.feasible:
+                quotas = largest_remainder(total, basis_points)
+                assert all(quota <= cap for quota, cap in zip(quotas, row_caps))
@@ -0,0 +1,30 @@
+import threading
+
+import numpy as np
+
+from constants import TROOP_TYPES, TROOP_TIERS
+from models.buffs import BuffConfiguration
+from models.roster_store import RosterStore
+from models.troop_inventory import TroopInventory
+
+
+def inventory(count: int) -> TroopInventory:
+    return TroopInventory(np.full((len(TROOP_TYPES), len(TROOP_TIERS)), count, dtype=np.int64))
+
+
+def test_concurrent_saves_keep_every_account(tmp_path):
+    store = RosterStore(tmp_path / 'roster.bin')
+    threads = [threading.Thread(target=store.save, args=(f"player{i}", 1000 + i, BuffConfiguration(0, 0, 0),
+                                                         inventory(i)))
+               for i in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reopened = RosterStore(tmp_path / 'roster.bin')
+    assert len(reopened) == 100
+    for i in range(100):
+        base_march_size, _, saved = reopened.load(f"player{i}")
+        assert base_march_size == 1000 + i
+        assert (saved.counts == i).all()
@@ -0,0 +1,20 @@
+import pytest
+
+from models.troop_inventory import TroopInventory
+
+
+@pytest.mark.parametrize('tier', [0, -1, 12])
+def test_tiers_outside_the_range_are_rejected(tier):
+    inventory = TroopInventory()
+    with pytest.raises(ValueError):
+        inventory.set('infantry', tier, 5)
+    with pytest.raises(ValueError):
+        inventory.get('infantry', tier)
+    assert inventory.counts.sum() == 0
+
+
+def test_set_and_get_use_the_tier_column():
+    inventory = TroopInventory.from_tiers({1: {'infantry': 3}, 11: {'marksman': 7}})
+    assert inventory.get('infantry', 1) == 3
+    assert inventory.get('marksman', 11) == 7
+    assert inventory.counts[0, 0] == 3 and inventory.counts[2, -1] == 7